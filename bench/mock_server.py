@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Listings per OpenSea page and events per event page, as in production
+PAGE_SIZE = 100
+EVENTS_PAGE_SIZE = 50
+
+CONTRACT = "0xd0a8ba528dfe402d34d34f171e5ff3e65bd4c9d4"
+
+_ALIASED_PLAYER = re.compile(r"(\w+): player\(where: \$(\w+)\)")
+_ALIASED_CLUB = re.compile(r"(\w+): club\(where: \$(\w+)\)")
+
+
+# Function to turn an id into a stable number in [0, 1) so every run sees the same data
+def stable_fraction(value):
+    digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+# Function to build a synthetic OpenSea listing for club `token_id`
+def make_listing(token_id):
+    price = int((0.05 + stable_fraction(f"price-{token_id}") * 2) * 10 ** 18)
+    return {
+        "order_hash": f"0x{token_id:064x}",
+        "chain": "arbitrum",
+        "protocol_data": {
+            "parameters": {
+                "offerer": "0x" + "ab" * 20,
+                "offer": [{"itemType": 2, "token": CONTRACT, "identifierOrCriteria": str(token_id),
+                           "startAmount": "1", "endAmount": "1"}],
+                "consideration": [{"itemType": 0, "token": "0x" + "00" * 20, "identifierOrCriteria": "0",
+                                   "startAmount": str(price), "endAmount": str(price)}],
+                "startTime": "1700000000",
+                "endTime": "9999999999",
+            },
+            "signature": None,
+        },
+        "protocol_address": "0x" + "00" * 20,
+    }
+
+
+# State shared by the three stand-in services: the listing pages served, data
+# knobs, fault injection and a log of (service, status, seconds, bytes) per request
+class MockState:
+    def __init__(self, listings=500, rare_rate=0.02, reward_max=185, latency_ms=0.0,
+                 error_rate=0.0, record_dir=None, seed=1):
+        self.rare_rate = rare_rate
+        self.reward_max = reward_max
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.pages = self._load_pages(record_dir) if record_dir else self._synthetic_pages(listings)
+        self.reset()
+
+    # Recorded pages are OpenSea responses saved as JSON files, replayed in name order
+    def _load_pages(self, record_dir):
+        pages = []
+        for filename in sorted(os.listdir(record_dir)):
+            if filename.endswith(".json"):
+                with open(os.path.join(record_dir, filename)) as file:
+                    pages.append(json.load(file).get("listings", []))
+        return pages
+
+    def _synthetic_pages(self, count):
+        listings = [make_listing(token_id) for token_id in range(1, count + 1)]
+        return [listings[i:i + PAGE_SIZE] for i in range(0, len(listings), PAGE_SIZE)] or [[]]
+
+    def reset(self):
+        with self.lock:
+            self.log = []
+            self.listings_served = 0
+
+    def record(self, service, status, seconds, size, listings=0):
+        with self.lock:
+            self.log.append((service, status, seconds, size))
+            self.listings_served += listings
+
+    # Sleep for the injected latency and decide whether this request fails
+    def fault(self):
+        with self.lock:
+            delay = self.latency * self.random.uniform(0.5, 1.5) if self.latency else 0
+            failed = self.random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        return failed
+
+    def player(self, player_id):
+        parts = player_id.split("-")
+        if player_id.endswith("-REWARD"):
+            if int(parts[-2]) > self.reward_max:
+                return None
+        elif len(parts) < 3 or not parts[-1].isdigit() or int(parts[-1]) > 6:
+            return None
+        rare = stable_fraction(f"rarity-{player_id}") < self.rare_rate
+        return {
+            "id": player_id,
+            "rarity": "Rare" if rare else "Common",
+            "creationRating": int(40 + stable_fraction(f"rating-{player_id}") * 40),
+            "potential": int(50 + stable_fraction(f"potential-{player_id}") * 45),
+            "club": {"id": parts[1], "name": f"Club {parts[1]}"},
+            "playerAttributes": {"age": 16, "leadership": 50, "condition": 100, "stamina": 100},
+            "imageUrls": {
+                "player": f"https://img.invalid/player/{player_id}.svg",
+                "card": f"https://img.invalid/card/{player_id}.svg",
+                "thumb": f"https://img.invalid/thumb/{player_id}.svg",
+            },
+        }
+
+    def club(self, club_id):
+        division = 1 + int(stable_fraction(f"division-{club_id}") * 10)
+        return {"id": club_id, "division": {"name": f"Division {division}"}}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, service, started, status, body=None, listings=0):
+        payload = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        self.server.state.record(service, status, time.perf_counter() - started, len(payload), listings)
+
+    def do_GET(self):
+        started = time.perf_counter()
+        state = self.server.state
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if state.fault():
+            return self._send("opensea", started, 500, {"detail": "injected error"})
+
+        cursor = int((query.get("next") or ["0"])[0])
+        if "/listings/" in url.path:
+            listings = state.pages[cursor] if cursor < len(state.pages) else []
+            body = {"listings": listings}
+            if cursor + 1 < len(state.pages):
+                body["next"] = str(cursor + 1)
+            return self._send("opensea", started, 200, body, len(listings))
+
+        if "/events/" in url.path:
+            now = int(time.time())
+            listings = [listing for page in state.pages for listing in page]
+            chunk = listings[cursor * EVENTS_PAGE_SIZE:(cursor + 1) * EVENTS_PAGE_SIZE]
+            events = []
+            for i, listing in enumerate(chunk):
+                parameters = listing["protocol_data"]["parameters"]
+                events.append({
+                    "event_type": "order",
+                    "order_hash": listing["order_hash"],
+                    "event_timestamp": now - cursor * EVENTS_PAGE_SIZE - i,
+                    "expiration_date": int(parameters["endTime"]),
+                    "asset": {"identifier": parameters["offer"][0]["identifierOrCriteria"], "contract": CONTRACT},
+                    "payment": {"quantity": parameters["consideration"][0]["startAmount"]},
+                })
+            body = {"asset_events": events}
+            if (cursor + 1) * EVENTS_PAGE_SIZE < len(listings):
+                body["next"] = str(cursor + 1)
+            return self._send("opensea", started, 200, body, len(events))
+
+        self._send("opensea", started, 404, {"detail": "not found"})
+
+    def do_POST(self):
+        started = time.perf_counter()
+        state = self.server.state
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        if "webhook" in self.path:
+            return self._send("discord", started, 503 if state.fault() else 204)
+        if state.fault():
+            return self._send("footium", started, 500, {"errors": [{"message": "injected error"}]})
+
+        query = body.get("query", "")
+        variables = body.get("variables") or {}
+        data = {}
+        for alias, name in _ALIASED_PLAYER.findall(query):
+            data[alias] = state.player(variables[name]["id"])
+        for alias, name in _ALIASED_CLUB.findall(query):
+            data[alias] = state.club(str(variables[name]["id"]))
+        if "getPlayerMetadata(" in query:
+            data = {"player": state.player(variables["where"]["id"])}
+        elif "getClubDivision(" in query:
+            data = {"club": state.club(str(variables["where"]["id"]))}
+        self._send("footium", started, 200, {"data": data})
+
+
+# Function to start one stand-in server on `host`, serving in a daemon thread
+def start_server(state, host="127.0.0.1", port=0):
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
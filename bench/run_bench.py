@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from mock_server import MockState, start_server
+
+# Repository root, where the scanner entry points live
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points benchmarked by default, with the command line they are run with
+ENTRY_POINTS = {
+    "SmallFoot.py": ["SmallFoot.py"],
+    "SmallFoot5.py": ["SmallFoot5.py"],
+    "MyFoot.py": ["MyFoot.py"],
+    "acad_regen.py": ["acad_regen.py"],
+    "wen-rare.py": ["wen-rare.py"],
+    "bigfoot run": ["-m", "bigfoot", "run"],
+}
+
+# Each service gets its own loopback address so host-keyed rate limits and
+# concurrency limits treat them as separate hosts, as in production
+SERVICE_HOSTS = {"opensea": "127.0.0.1", "footium": "127.0.0.2", "discord": "127.0.0.3"}
+
+
+# Function to pick the value at percentile `q` (0-100) by nearest rank
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+# Function to run one entry point against the stand-in services and measure it
+def run_entry_point(name, command, state, urls, options):
+    state.reset()
+    with tempfile.TemporaryDirectory() as work_dir:
+        env = dict(
+            os.environ,
+            OPENSEA_API_KEY="bench",
+            OPENSEA_API_URL=urls["opensea"],
+            FOOTIUM_GRAPHQL_ENDPOINT=urls["footium"] + "/api/graphql",
+            DISCORD_WEBHOOK_URL=urls["discord"] + "/webhook/1/bench",
+            DISCORD_WEBHOOK_URL2=urls["discord"] + "/webhook/2/bench",
+            BIGFOOT_STATE_DB=os.path.join(work_dir, "bigfoot_state.db"),
+            BIGFOOT_CACHE_DB=os.path.join(work_dir, "bigfoot_cache.db"),
+            HISTORY_DIR=os.path.join(work_dir, "history"),
+            FULL_SCAN="1",
+            HTTP_DEFAULT_RATE_LIMIT=str(options.rate_limit),
+            DEFAULT_CONCURRENCY=str(options.concurrency),
+            HTTP_MAX_RETRIES=str(options.retries),
+            NOTIFY_FLUSH_TIMEOUT=str(options.flush_timeout),
+        )
+        log_path = os.path.join(work_dir, "output.log")
+        started = time.perf_counter()
+        with open(log_path, "w") as log:
+            process = subprocess.Popen(
+                [sys.executable] + command, cwd=REPO_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+            )
+            _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - started
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode and options.verbose:
+            with open(log_path) as log:
+                print(log.read()[-2000:])
+
+    latencies = [seconds * 1000 for _, _, seconds, _ in state.log]
+    requests_by_service = {}
+    for service, _, _, _ in state.log:
+        requests_by_service[service] = requests_by_service.get(service, 0) + 1
+    listings = state.listings_served
+    return {
+        "entry_point": name,
+        "exit_code": process.returncode,
+        "wall_s": round(wall, 3),
+        "requests": len(state.log),
+        "requests_by_service": requests_by_service,
+        "errors": sum(1 for _, status, _, _ in state.log if status >= 500),
+        "listings": listings,
+        "requests_per_listing": round(len(state.log) / listings, 3) if listings else None,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "bytes": sum(size for _, _, _, size in state.log),
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+    }
+
+
+def print_table(results):
+    header = f"{'entry point':<15} {'exit':>4} {'wall s':>8} {'reqs':>6} {'listings':>8} {'req/list':>8} " \
+             f"{'p50 ms':>8} {'p99 ms':>8} {'errors':>6} {'RSS MB':>7}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        per_listing = result["requests_per_listing"]
+        print(
+            f"{result['entry_point']:<15} {result['exit_code']:>4} {result['wall_s']:>8.2f} {result['requests']:>6} "
+            f"{result['listings']:>8} {per_listing if per_listing is not None else '-':>8} "
+            f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['errors']:>6} {result['peak_rss_mb']:>7.1f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scanners against local stand-ins for OpenSea, Footium and Discord.")
+    parser.add_argument("entry_points", nargs="*", help="entry points to run (default: all)")
+    parser.add_argument("--listings", type=int, default=500, help="synthetic listings served")
+    parser.add_argument("--record-dir", help="directory of recorded OpenSea listing pages (*.json) to replay instead")
+    parser.add_argument("--rare-rate", type=float, default=0.02, help="share of academy players that are Rare")
+    parser.add_argument("--reward-max", type=int, default=185, help="highest REWARD number that exists")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="mean injected latency per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a 5xx")
+    parser.add_argument("--rate-limit", type=float, default=1000.0, help="client requests/s per stand-in host")
+    parser.add_argument("--concurrency", type=int, default=8, help="client concurrency per stand-in host")
+    parser.add_argument("--retries", type=int, default=4, help="client retries per request")
+    parser.add_argument("--flush-timeout", type=float, default=10.0,
+                        help="seconds the alert queue may wait out a failed delivery before exiting")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="print the output of failed runs")
+    options = parser.parse_args(argv)
+
+    state = MockState(
+        listings=options.listings, rare_rate=options.rare_rate, reward_max=options.reward_max,
+        latency_ms=options.latency_ms, error_rate=options.error_rate, record_dir=options.record_dir,
+    )
+    servers = {service: start_server(state, host) for service, host in SERVICE_HOSTS.items()}
+    urls = {service: f"http://{host}:{servers[service].server_port}" for service, host in SERVICE_HOSTS.items()}
+
+    names = options.entry_points or list(ENTRY_POINTS)
+    results = [run_entry_point(name, ENTRY_POINTS.get(name, [name]), state, urls, options) for name in names]
+    print_table(results)
+    if options.json:
+        with open(options.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+    for server in servers.values():
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
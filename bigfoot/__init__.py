@@ -0,0 +1 @@
+# Command line entry point for the scanners; see bigfoot/cli.py
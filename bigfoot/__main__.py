@@ -0,0 +1,4 @@
+from bigfoot.cli import main
+
+# Allows `python -m bigfoot <command>` from a checkout without installing
+main()
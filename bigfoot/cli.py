@@ -0,0 +1,193 @@
+import argparse
+import os
+import sys
+
+# Watermark names the scans have always used in the state database, so
+# switching a workflow to the CLI resumes where its script left off
+WATERMARKS = {
+    "academy": "smallfoot-listings",
+    "gen5": "smallfoot5-listings",
+    "myfoot": "myfoot-listings",
+}
+
+# Every subcommand imports the scanner modules it needs only once it runs, so
+# `bigfoot --help` and the commands that never walk listings stay cheap to start
+
+
+# Function to check for the OpenSea key before a command that walks listings
+def require_api_key():
+    from bigfoot.opensea_api import API_KEY
+
+    if not API_KEY:
+        print("Error: Missing OPENSEA_API_KEY. Exiting script.")
+        exit(1)
+    print(f"API Key length: {len(API_KEY)}")
+
+
+# Scan new listings for clubs with an unminted rare academy player (SmallFoot.py, SmallFoot5.py)
+def scan(args):
+    require_api_key()
+    from bigfoot.detectors import AcademyRareDetector, HistoryRecorder
+    from bigfoot.runner import GEN5_TITLE, run
+
+    webhook_url = os.getenv("DISCORD_WEBHOOK_URL")
+    if args.gen5:
+        detector = AcademyRareDetector("gen5", webhook_url, title=GEN5_TITLE)
+    else:
+        detector = AcademyRareDetector("academy", webhook_url, scope="")
+    # The listings seen are recorded so the division floors the deals are scored against exist
+    run([detector, HistoryRecorder(detector.generation)], WATERMARKS[detector.name])
+
+
+# Sweep the watchlist clubs and scan new listings, alerting both in the
+# watchlist format (MyFoot.py)
+def sweep(args):
+    from bigfoot.detectors import AcademyRareDetector, ClubWatchlistDetector, HistoryRecorder
+    from bigfoot.runner import run
+    from bigfoot.sweep import load_sweep
+
+    webhook_url = os.getenv("DISCORD_WEBHOOK_URL2")
+    watchlist = ClubWatchlistDetector(load_sweep(args.sweep), webhook_url)
+    detectors = [watchlist]
+    if not args.no_listings:
+        require_api_key()
+
+        # Post a listed rare club in the same format as the watchlist
+        def post_listing_to_webhook(opensea_url, footium_url, eth_price, division):
+            watchlist.post_to_webhook(footium_url.rsplit("/", 1)[-1])
+
+        detectors.append(AcademyRareDetector("myfoot", webhook_url, notify=post_listing_to_webhook))
+        detectors.append(HistoryRecorder())
+    run(detectors, None if args.no_listings else WATERMARKS["myfoot"])
+
+
+# Check the clubs of the regen sweep for refreshed academies (acad_regen.py)
+def regen(args):
+    from bigfoot.detectors import RegenRefreshDetector
+    from bigfoot.runner import run
+    from bigfoot.sweep import load_sweep
+
+    run([RegenRefreshDetector(os.getenv("DISCORD_WEBHOOK_URL"), load_sweep(args.sweep))], watermark_name=None)
+
+
+# Probe for new REWARD players (wen-rare.py)
+def rewards(args):
+    from bigfoot.detectors import RewardPlayerDetector
+    from bigfoot.runner import run
+    from bigfoot.sweep import load_reward_probes
+
+    run([RewardPlayerDetector(os.getenv("DISCORD_WEBHOOK_URL2"), **load_reward_probes())], watermark_name=None)
+
+
+# Refresh the stale entries of the league-wide academy rarity index
+def index(args):
+    from bigfoot import metrics, rarity_index, state_db
+    from bigfoot.sweep import load_sweep
+
+    # Options left unset fall back to rarity_index's environment-configured defaults
+    options = {"generation": args.generation, "max_age": args.max_age, "limit": args.limit}
+    try:
+        metrics.profiled(
+            rarity_index.crawl,
+            load_sweep(args.sweep).ids(),
+            **{name: value for name, value in options.items() if value is not None},
+        )
+    finally:
+        state_db.persist()
+        metrics.report()
+
+
+# Merge the outputs of a sharded run (state snapshot, history, metrics) into
+# this checkout, one directory per shard
+def merge(args):
+    from bigfoot import metrics, shard
+
+    shard.merge(args.shard_dirs, base_path=args.base)
+    metrics.report()
+
+
+# Commit and push the state snapshot, and the given paths, when they changed
+def commit_state(args):
+    from bigfoot import state_db
+
+    if not state_db.commit_snapshot(args.message, args.paths):
+        exit(1)
+
+
+# Run every detector, or the named ones, from one shared fetch pass (runner.py)
+def run_all(args):
+    from bigfoot import runner
+
+    runner.main(args.detectors)
+
+
+# Keep checking new listings until interrupted (daemon.py)
+def daemon(args):
+    from bigfoot import daemon
+
+    daemon.main()
+
+
+# Function to build the argument parser; --profile and --shard are accepted by every command
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--profile", action="store_true", help="run under cProfile and print the slowest functions")
+    common.add_argument("--shard", metavar="I/N", help="only handle shard I of N (listings, club ids, reward probes)")
+
+    parser = argparse.ArgumentParser(prog="bigfoot", description="Footium academy and listing scanners.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("scan", parents=[common], help="alert new listings of clubs with a rare academy player")
+    command.add_argument("--gen5", action="store_true", help="use the generation 5 alert title and dedup scope")
+    command.set_defaults(handler=scan)
+
+    command = commands.add_parser("sweep", parents=[common], help="check the watchlist clubs and new listings")
+    command.add_argument("--sweep", default="watchlist", help="sweep to load from sweeps.json")
+    command.add_argument("--no-listings", action="store_true", help="only check the swept clubs")
+    command.set_defaults(handler=sweep)
+
+    command = commands.add_parser("regen", parents=[common], help="alert clubs whose academy was regenerated")
+    command.add_argument("--sweep", default="regen", help="sweep to load from sweeps.json")
+    command.set_defaults(handler=regen)
+
+    command = commands.add_parser("rewards", parents=[common], help="alert new REWARD players")
+    command.set_defaults(handler=rewards)
+
+    command = commands.add_parser("index", parents=[common], help="refresh the academy rarity index")
+    command.add_argument("--sweep", default="index", help="sweep of club ids to load from sweeps.json")
+    command.add_argument("--generation", type=int, help="academy generation to index")
+    command.add_argument("--max-age", type=float, help="refresh entries older than this many seconds")
+    command.add_argument("--limit", type=int, help="refresh at most this many clubs, oldest first (0: no limit)")
+    command.set_defaults(handler=index)
+
+    command = commands.add_parser("run", parents=[common], help="run every detector from one shared fetch pass")
+    command.add_argument("detectors", nargs="*", help="detectors to run (default: all)")
+    command.set_defaults(handler=run_all)
+
+    command = commands.add_parser("merge", parents=[common], help="merge the outputs of a sharded run")
+    command.add_argument("shard_dirs", nargs="+", help="one directory per shard with its state snapshot")
+    command.add_argument("--base", help="state snapshot the shards started from (default: the checked-out one)")
+    command.set_defaults(handler=merge)
+
+    command = commands.add_parser("commit-state", parents=[common], help="commit and push the state if it changed")
+    command.add_argument("-m", "--message", default="Update scanner state", help="commit message")
+    command.add_argument("paths", nargs="*", help="other paths to commit with the snapshot, e.g. history")
+    command.set_defaults(handler=commit_state)
+
+    command = commands.add_parser("daemon", parents=[common], help="keep checking new listings until interrupted")
+    command.set_defaults(handler=daemon)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(sys.argv[1:] if argv is None else argv)
+    # metrics and shard read these when they are first imported
+    if args.profile:
+        os.environ["PROFILE"] = "1"
+    if args.shard:
+        os.environ["SHARD"] = args.shard
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import hashlib
+import json
+
+from bigfoot import state_db
+
+# SQLite caps the number of bound parameters per statement
+_CHUNK = 500
+
+
+# Function to hash a JSON-serialisable value into a signed 64-bit integer
+def content_hash(value):
+    digest = hashlib.blake2b(json.dumps(value, sort_keys=True).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+# Index of the last seen content hash per key (e.g. a player's imageUrls),
+# stored as 64-bit integers in the state database
+class ContentHashIndex:
+    def __init__(self, name, connection=None):
+        self.name = name
+        self.connection = connection or state_db.connect()
+        self.lock = state_db.lock
+        with self.lock, self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS content_hashes (
+                    name TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    hash INTEGER NOT NULL,
+                    PRIMARY KEY (name, key)
+                )
+                """
+            )
+
+    # Store {key: value} hashes and return the keys whose hash changed since the
+    # previous update; keys seen for the first time only set the baseline
+    def update(self, values):
+        hashes = {key: content_hash(value) for key, value in values.items()}
+        keys = list(hashes)
+        previous = {}
+        with self.lock:
+            for start in range(0, len(keys), _CHUNK):
+                chunk = keys[start:start + _CHUNK]
+                placeholders = ", ".join("?" * len(chunk))
+                previous.update(self.connection.execute(
+                    f"SELECT key, hash FROM content_hashes WHERE name = ? AND key IN ({placeholders})",
+                    [self.name] + chunk,
+                ))
+            changed = [key for key in keys if key in previous and previous[key] != hashes[key]]
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO content_hashes VALUES (?, ?, ?)",
+                    [(self.name, key, value) for key, value in hashes.items() if previous.get(key) != value],
+                )
+        return changed
@@ -0,0 +1,221 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bigfoot import metrics, notify_queue, single_flight, state_db
+from bigfoot.detectors import AcademyRareDetector, HistoryRecorder
+from bigfoot.listing_scan import WATERMARK_OVERLAP
+from bigfoot.opensea_api import API_KEY, COLLECTION_SLUG, STREAM_URL, parse_stream_event
+from bigfoot.runner import PlayerSnapshot, check_listings
+from bigfoot.scanner import HostLimiter, scan_listing_events
+from bigfoot.sync_state import get_watermark, set_watermark
+
+try:
+    import websocket  # websocket-client; optional, enables the OpenSea Stream API
+except ImportError:
+    websocket = None
+
+# Webhook URL from the environment
+WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL")
+
+# Name of the daemon's watermark in the state database
+WATERMARK_NAME = "daemon-listings"
+
+# Adaptive polling of the event feed: back off while nothing is listed,
+# drop back to the minimum as soon as something is
+MIN_POLL_INTERVAL = float(os.getenv("DAEMON_MIN_POLL", "5"))
+MAX_POLL_INTERVAL = float(os.getenv("DAEMON_MAX_POLL", "60"))
+POLL_BACKOFF = 1.5
+
+# Seconds looked back on the very first start, when there is no watermark yet
+STARTUP_LOOKBACK = 600
+
+# Seconds between state snapshots while the daemon runs
+SNAPSHOT_INTERVAL = float(os.getenv("DAEMON_SNAPSHOT_INTERVAL", "300"))
+
+# Stream API keep-alive and reconnect timings, in seconds
+HEARTBEAT_INTERVAL = 30
+STREAM_RECV_TIMEOUT = 5
+STREAM_RECONNECT_DELAY = 10
+
+
+# Background thread that listens to OpenSea's item_listed stream and feeds
+# parsed listing rows into an asyncio queue
+class ListingStream:
+    def __init__(self, loop, queue):
+        self.loop = loop
+        self.queue = queue
+        self.connected = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self.run, name="opensea-stream", daemon=True).start()
+
+    # Keep the stream connected for the life of the process
+    def run(self):
+        while True:
+            try:
+                self.listen()
+            except Exception as e:
+                print(f"OpenSea stream disconnected: {e}")
+            self.connected.clear()
+            time.sleep(STREAM_RECONNECT_DELAY)
+
+    def listen(self):
+        ws = websocket.create_connection(STREAM_URL, timeout=STREAM_RECV_TIMEOUT)
+        try:
+            ref = 0
+            ws.send(json.dumps({"topic": f"collection:{COLLECTION_SLUG}", "event": "phx_join", "payload": {}, "ref": ref}))
+            self.connected.set()
+            print("Connected to the OpenSea stream.")
+            last_heartbeat = time.monotonic()
+            while True:
+                if time.monotonic() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                    ref += 1
+                    ws.send(json.dumps({"topic": "phoenix", "event": "heartbeat", "payload": {}, "ref": ref}))
+                    last_heartbeat = time.monotonic()
+                try:
+                    message = json.loads(ws.recv())
+                except websocket.WebSocketTimeoutException:
+                    continue
+                if message.get("event") != "item_listed":
+                    continue
+                try:
+                    row = parse_stream_event(message["payload"])
+                except (KeyError, TypeError, ValueError) as e:
+                    print(f"Error processing stream event: {e}. Skipping...")
+                    continue
+                self.loop.call_soon_threadsafe(self.queue.put_nowait, row)
+        finally:
+            ws.close()
+
+
+# Function to check streamed listings as they arrive, batching whatever queued up
+# while the previous batch was being checked. A batch that fails is logged and
+# skipped; the poller reconciles its listings later.
+async def consume_stream(queue, handle_page):
+    while True:
+        rows = [await queue.get()]
+        while not queue.empty():
+            rows.append(queue.get_nowait())
+        print(f"Checking {len(rows)} streamed listings.")
+        try:
+            await handle_page(rows)
+        except Exception as e:
+            print(f"Error checking streamed listings: {e}. Skipping...")
+            metrics.count("daemon_errors_total", loop="stream")
+
+
+# Function to poll the event feed forever with an adaptive interval. While the
+# stream is connected this only reconciles anything it missed. A page that
+# fails, or has listings whose lookups failed, is logged and the walk goes on,
+# but the watermark is left where it was
+# so the next poll checks that page again; the dedup store keeps the listings
+# already alerted from being alerted twice.
+async def poll_events(handle_page, limiter, stream):
+    since = get_watermark(WATERMARK_NAME) or int(time.time()) - STARTUP_LOOKBACK
+    interval = MIN_POLL_INTERVAL
+    last_snapshot = time.monotonic()
+    while True:
+        failed = False
+
+        async def check_page(rows):
+            nonlocal failed
+            try:
+                deferred = await handle_page(rows)
+            except Exception as e:
+                print(f"Error checking polled listings: {e}. Retrying on the next poll...")
+                metrics.count("daemon_errors_total", loop="poll")
+                failed = True
+                return
+            if deferred:
+                print(f"Checking {len(deferred)} listings again on the next poll.")
+                failed = True
+
+        try:
+            newest = await scan_listing_events(check_page, limiter, since - WATERMARK_OVERLAP)
+        except Exception as e:
+            print(f"Error polling listing events: {e}. Retrying...")
+            metrics.count("daemon_errors_total", loop="poll")
+            newest = None
+        if failed:
+            newest = None
+        found_new = newest is not None and newest > since
+        if newest is not None:
+            since = max(since, newest)
+            set_watermark(WATERMARK_NAME, since)
+
+        if time.monotonic() - last_snapshot >= SNAPSHOT_INTERVAL:
+            state_db.save_snapshot()
+            if metrics.METRICS_FILE or metrics.PROMETHEUS_FILE:
+                metrics.report()
+            last_snapshot = time.monotonic()
+
+        if stream is not None and stream.connected.is_set():
+            interval = MAX_POLL_INTERVAL
+        elif found_new:
+            interval = MIN_POLL_INTERVAL
+        else:
+            interval = min(MAX_POLL_INTERVAL, interval * POLL_BACKOFF)
+        await asyncio.sleep(interval)
+
+
+# Function to run the daemon until interrupted, keeping the dedup index,
+# metadata cache and HTTP pools warm between checks
+async def run_daemon(limiter):
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=limiter.max_workers()))
+    # Same dedup scope as SmallFoot.py, so the daemon and the cron scan never
+    # alert the same listing twice. The listings seen are recorded so the
+    # division floors the deals are scored against exist.
+    detectors = [AcademyRareDetector("academy", WEBHOOK_URL, scope=""), HistoryRecorder()]
+
+    # Deliver alerts left queued by an earlier run while new ones come in
+    notify_queue.get_queue().start()
+
+    # Stream and poller can see the same listing; checking one batch at a time
+    # lets the dedup store suppress the second alert
+    lock = asyncio.Lock()
+
+    # Each batch gets a fresh snapshot and fresh lookup memos so the process
+    # never holds stale players; repeat lookups are served by the metadata
+    # cache instead. Returns the rows whose player lookups failed.
+    async def handle_page(rows):
+        async with lock:
+            single_flight.reset()
+            return await check_listings(detectors, rows, PlayerSnapshot(), limiter)
+
+    stream = None
+    if websocket is None:
+        print("websocket-client is not installed, polling the event feed only.")
+    else:
+        queue = asyncio.Queue()
+        stream = ListingStream(loop, queue)
+        stream.start()
+        # Kept referenced, so the task is not garbage collected while it runs
+        consumer = asyncio.ensure_future(consume_stream(queue, handle_page))
+
+    try:
+        await poll_events(handle_page, limiter, stream)
+    finally:
+        if stream is not None:
+            consumer.cancel()
+
+
+def main():
+    if not API_KEY:
+        print("Error: Missing OPENSEA_API_KEY. Exiting script.")
+        exit(1)
+    try:
+        metrics.profiled(asyncio.run, run_daemon(HostLimiter()))
+    except KeyboardInterrupt:
+        print("Daemon stopped.")
+    finally:
+        state_db.save_snapshot()
+        metrics.report()
+
+
+if __name__ == "__main__":
+    main()
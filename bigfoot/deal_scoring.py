@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+from array import array
+
+from bigfoot import history_store
+
+# Listings scoring below this are not alerted. A score is the division floor
+# divided by the price, so 1.0 means "at the floor" and 1.25 "20% below it";
+# 0 alerts every rare listing.
+SCORE_THRESHOLD = float(os.getenv("DEAL_SCORE_THRESHOLD", "0"))
+
+# Days of listing history the division floors are computed from
+FLOOR_DAYS = int(os.getenv("DEAL_FLOOR_DAYS", "30"))
+
+# Seconds before the floors are recomputed from the history store
+FLOOR_REFRESH = 600
+
+# Score of listings whose division has no floor yet; they are always alerted
+NO_FLOOR = float("inf")
+
+_floors = None
+_floors_loaded_at = 0.0
+_floors_lock = threading.Lock()
+
+
+# Function to get {division: floor price in gwei}, reloaded every FLOOR_REFRESH seconds
+def division_floors():
+    global _floors, _floors_loaded_at
+    with _floors_lock:
+        if _floors is None or time.monotonic() - _floors_loaded_at > FLOOR_REFRESH:
+            _floors = history_store.floors_gwei(FLOOR_DAYS)
+            _floors_loaded_at = time.monotonic()
+        return _floors
+
+
+# Function to score a page of listings. `prices_wei` and `divisions` are
+# parallel sequences; returns an array of scores. This is a plain loop per
+# listing, only stored in typed arrays.
+def score_listings(prices_wei, divisions, floors=None):
+    floors = division_floors() if floors is None else floors
+    prices = array("Q", (price // history_store.WEI_PER_GWEI for price in prices_wei))
+    floor_column = array("Q", (floors.get(division, 0) for division in divisions))
+    return array("d", (
+        floor / price if floor and price else NO_FLOOR
+        for price, floor in zip(prices, floor_column)
+    ))
+
+
+# Function to rank listings before their academies are looked up, by the same
+# score: clubs whose division is not known yet (None) are measured against the
+# lowest floor, so they neither jump the queue nor fall to the back of it
+def priorities(prices_wei, divisions, floors=None):
+    floors = division_floors() if floors is None else floors
+    reference = dict(floors)
+    reference[None] = min(floors.values(), default=0)
+    return score_listings(prices_wei, [division if division in floors else None for division in divisions], reference)
+
+
+# Function to keep the indexes of the scores that reach the threshold
+def passing(scores, threshold=SCORE_THRESHOLD):
+    return [i for i, score in enumerate(scores) if score >= threshold]
@@ -0,0 +1,82 @@
+import csv
+import os
+
+from bigfoot import state_db
+
+# Legacy CSV of posted listings, imported into the store the first time it is opened
+CSV_FILE = "footium_clubs_listings.csv"
+
+_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS posted_listings (
+        scope TEXT NOT NULL DEFAULT '',
+        contract TEXT NOT NULL,
+        token_id TEXT NOT NULL,
+        order_hash TEXT NOT NULL DEFAULT '',
+        opensea_url TEXT,
+        footium_url TEXT,
+        UNIQUE (scope, contract, token_id, order_hash)
+    )
+"""
+
+_INSERT = """
+    INSERT OR IGNORE INTO posted_listings (scope, contract, token_id, order_hash, opensea_url, footium_url)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+# Function to split an OpenSea asset URL into (contract, token id)
+def parse_opensea_url(opensea_url):
+    contract, token_id = opensea_url.rstrip("/").split("/")[-2:]
+    return contract.lower(), token_id
+
+
+# Index of listings that have already been alerted, keyed on
+# (contract, token id, order hash) within a scope, so several detectors can
+# alert the same listing once each. It is loaded into memory once per run so
+# membership checks never touch the disk. Rows imported from the legacy CSV
+# have no scope or order hash and match every listing of their token everywhere.
+class DedupStore:
+    def __init__(self, connection=None, csv_file=CSV_FILE, scope=""):
+        self.connection = connection or state_db.connect()
+        self.scope = scope
+        self.connection.execute(_CREATE_TABLE)
+        if self.connection.execute("SELECT COUNT(*) FROM posted_listings").fetchone()[0] == 0:
+            self.import_csv(csv_file)
+        self._keys = set(
+            self.connection.execute(
+                "SELECT contract, token_id, order_hash FROM posted_listings WHERE scope = ? OR (scope = '' AND order_hash = '')",
+                (scope,),
+            )
+        )
+
+    # Import the legacy CSV history (OpenSea URL, Footium URL) if it exists
+    def import_csv(self, csv_file):
+        if not os.path.exists(csv_file):
+            return
+        rows = []
+        with open(csv_file, mode='r', newline='') as file:
+            reader = csv.reader(file)
+            next(reader, None)  # Header row
+            for row in reader:
+                if row and row[0].startswith("http"):
+                    contract, token_id = parse_opensea_url(row[0])
+                    rows.append(("", contract, token_id, "", row[0], row[1] if len(row) > 1 else None))
+        with state_db.lock, self.connection:
+            self.connection.executemany(_INSERT, rows)
+        print(f"Imported {len(rows)} listings from {csv_file} into the dedup store.")
+
+    # Check whether a listing has already been posted
+    def contains(self, contract, token_id, order_hash=""):
+        contract, token_id = contract.lower(), str(token_id)
+        return (contract, token_id, order_hash) in self._keys or (contract, token_id, "") in self._keys
+
+    # Return the (contract, token id, order hash) keys from `keys` that have not been posted yet
+    def unseen(self, keys):
+        return [key for key in keys if not self.contains(*key)]
+
+    # Record a posted listing
+    def add(self, contract, token_id, order_hash, opensea_url=None, footium_url=None):
+        key = (contract.lower(), str(token_id), order_hash or "")
+        with state_db.lock, self.connection:
+            self.connection.execute(_INSERT, (self.scope,) + key + (opensea_url, footium_url))
+        self._keys.add(key)
@@ -0,0 +1,304 @@
+import asyncio
+import json
+
+import requests
+
+from bigfoot import metrics, notify_queue, shard
+from bigfoot.footium_api import (
+    ACADEMY_GENERATION,
+    ACADEMY_SLOTS,
+    GRAPHQL_ENDPOINT,
+    academy_player_id,
+    clubs_with_unminted_rare_player,
+    get_club_divisions,
+    get_players_metadata,
+    is_rare,
+)
+
+
+# Base class for detectors run by runner.py. A detector names the player ids it
+# needs, for its own watched ids and for each page of listing rows, and the
+# runner fetches every id once per run before calling the evaluate hooks with
+# the shared {player_id: metadata} snapshot. Detectors that probe large id
+# ranges set `sweep` instead and receive hits from the sweep engine as they arrive.
+# Each detector imports the modules only it uses where it uses them, so a
+# command loads no more than its own detectors need.
+class Detector:
+    # Name used to select the detector from the command line and to scope its dedup entries
+    name = "detector"
+
+    # GraphQL selection this detector reads for each player
+    fields = "id"
+
+    # Whether the runner has to walk listings for this detector
+    uses_listings = False
+
+    # Whether this detector alerts on listings. Those that only record them run
+    # after the alerting ones, and a failed lookup of theirs never defers a row.
+    alerts = True
+
+    # sweep.Sweep of ids streamed through check_batch and on_hit, or None
+    sweep = None
+
+    # Player ids checked once per run, independent of listings
+    def watched_player_ids(self):
+        return []
+
+    # Player ids needed to evaluate a page of (identifier, token, price, order hash) rows
+    def listing_player_ids(self, rows):
+        return []
+
+    async def evaluate_watched(self, players, limiter):
+        pass
+
+    async def evaluate_listings(self, rows, players, limiter):
+        pass
+
+    # Blocking lookup of a batch of sweep ids, returning {id: result}; falsy results are misses
+    def check_batch(self, ids):
+        return {}
+
+    async def on_hit(self, item, result, limiter):
+        pass
+
+
+# Alerts listed clubs with an unminted "Rare" academy player (SmallFoot.py).
+# Clubs with a fresh entry in the rarity index are answered from it; only the
+# others have their academy looked up live.
+class AcademyRareDetector(Detector):
+    fields = "id rarity"
+    uses_listings = True
+
+    # `title` defaults to listing_scan.DEFAULT_TITLE
+    def __init__(self, name, webhook_url, title=None, generation=ACADEMY_GENERATION,
+                 notify=None, on_posted=None, scope=None):
+        self.name = name
+        self.webhook_url = webhook_url
+        self.title = title
+        self.generation = generation
+        self.notify = notify or self.post_to_webhook
+        self.on_posted = on_posted
+        self.scope = name if scope is None else scope
+        self._dedup = None
+        self._index = None
+
+    @property
+    def dedup(self):
+        if self._dedup is None:
+            from bigfoot.dedup_store import DedupStore
+
+            with metrics.span("dedup_load"):
+                self._dedup = DedupStore(scope=self.scope)
+        return self._dedup
+
+    @property
+    def index(self):
+        if self._index is None:
+            from bigfoot import rarity_index
+
+            self._index = rarity_index.get_index(self.generation)
+        return self._index
+
+    def academy_ids(self, club_id):
+        return [academy_player_id(club_id, n, self.generation) for n in ACADEMY_SLOTS]
+
+    # Listings that were already alerted, or whose club is in the rarity index,
+    # need no player lookups at all
+    def listing_player_ids(self, rows):
+        return [
+            player_id
+            for identifier, token, _, order_hash in rows
+            if not self.dedup.contains(token, identifier, order_hash)
+            and self.index.has_unminted_rare_player(identifier) is None
+            for player_id in self.academy_ids(identifier)
+        ]
+
+    async def evaluate_listings(self, rows, players, limiter):
+        from bigfoot.listing_scan import alert_rare_listings
+
+        rare_clubs = set()
+        indexed = 0
+        for identifier, _, _, _ in rows:
+            known = self.index.has_unminted_rare_player(identifier)
+            if known is not None:
+                indexed += 1
+                if known:
+                    rare_clubs.add(identifier)
+                continue
+            if any(is_rare(players.get(player_id)) for player_id in self.academy_ids(identifier)):
+                rare_clubs.add(identifier)
+        metrics.count("index_lookups_total", indexed, result="hit")
+        metrics.count("index_lookups_total", len(rows) - indexed, result="miss")
+        await alert_rare_listings(rows, rare_clubs, limiter, self.dedup, self.notify, self.on_posted)
+
+    def post_to_webhook(self, opensea_url, footium_url, eth_price, division):
+        from bigfoot.listing_scan import DEFAULT_TITLE, post_to_webhook
+
+        post_to_webhook(opensea_url, footium_url, eth_price, division, self.webhook_url, self.title or DEFAULT_TITLE)
+
+
+# Appends every listing seen, with its division and academy rarity/potential,
+# to the columnar history store in history_store.py
+class HistoryRecorder(Detector):
+    name = "history"
+    fields = "id rarity potential"
+    uses_listings = True
+    alerts = False
+
+    def __init__(self, generation=ACADEMY_GENERATION):
+        self.generation = generation
+
+    def academy_ids(self, club_id):
+        return [academy_player_id(club_id, n, self.generation) for n in ACADEMY_SLOTS]
+
+    def listing_player_ids(self, rows):
+        return [player_id for identifier, _, _, _ in rows for player_id in self.academy_ids(identifier)]
+
+    async def evaluate_listings(self, rows, players, limiter):
+        from bigfoot import history_store
+
+        divisions = await limiter.run(GRAPHQL_ENDPOINT, get_club_divisions, [identifier for identifier, _, _, _ in rows])
+        records = [
+            (
+                identifier,
+                price,
+                None if divisions[identifier] == "Unknown Division" else divisions[identifier],
+                [players.get(player_id) for player_id in self.academy_ids(identifier)],
+            )
+            for identifier, _, price, _ in rows
+        ]
+        with metrics.span("history_append"):
+            await asyncio.to_thread(history_store.append_listings, records)
+
+
+# Alerts clubs from a swept watchlist with a "Rare" academy player (MyFoot.py)
+class ClubWatchlistDetector(Detector):
+    name = "watchlist"
+
+    def __init__(self, sweep, webhook_url, generation=ACADEMY_GENERATION):
+        self.sweep = sweep
+        self.webhook_url = webhook_url
+        self.generation = generation
+
+    def check_batch(self, club_ids):
+        print(f"Checking clubs: {', '.join(club_ids)}")
+        return {club_id: True for club_id in clubs_with_unminted_rare_player(club_ids, self.generation)}
+
+    async def on_hit(self, club_id, result, limiter):
+        print(f"Rare player found for club {club_id}!")
+        await limiter.run(self.webhook_url, self.post_to_webhook, club_id)
+
+    def post_to_webhook(self, club_id):
+        opensea_url = f"https://opensea.io/assets/arbitrum/0xd0a8ba528dfe402d34d34f171e5ff3e65bd4c9d4/{club_id}"
+        footium_url = f"https://footium.club/game/club/{club_id}"
+        message = (
+            f"OpenSea URL: {opensea_url}\n"
+            f"Footium URL: {footium_url}"
+        )
+        notify_queue.notify(self.webhook_url, "Rare player found!", message)
+
+
+# Alerts academy players whose images changed since the previous run, which
+# means their academy was regenerated (acad_regen.py). The first run only
+# records the baseline.
+class RegenRefreshDetector(Detector):
+    name = "regen"
+    fields = "id imageUrls { player card thumb }"
+
+    def __init__(self, webhook_url, sweep, generation=4, slots=range(5)):
+        self.webhook_url = webhook_url
+        self.sweep = sweep
+        self.generation = generation
+        self.slots = slots
+        self._hashes = None
+
+    @property
+    def hashes(self):
+        if self._hashes is None:
+            from bigfoot.content_hashes import ContentHashIndex
+
+            self._hashes = ContentHashIndex(f"regen-{self.generation}")
+        return self._hashes
+
+    # Returns {club_id: [player ids whose images changed]} for the refreshed clubs
+    def check_batch(self, club_ids):
+        club_of = {academy_player_id(club_id, n, self.generation): club_id for club_id in club_ids for n in self.slots}
+        player_ids = list(club_of)
+        players = get_players_metadata(player_ids, self.fields)
+        missing = [player_id for player_id in player_ids if not players.get(player_id)]
+        if missing:
+            print(f"Failed to retrieve data for {len(missing)} players, e.g. {missing[0]}")
+        changed = self.hashes.update({
+            player_id: player.get("imageUrls") for player_id, player in players.items() if player
+        })
+        refreshed = {}
+        for player_id in changed:
+            refreshed.setdefault(club_of[player_id], []).append(player_id)
+        return refreshed
+
+    async def on_hit(self, club_id, player_ids, limiter):
+        from bigfoot import metadata_cache, rarity_index
+
+        # The academy was regenerated, so what the academy detectors read about
+        # the club (cached player metadata and rarity index entry, both of
+        # ACADEMY_GENERATION rather than the generation watched here) is stale
+        metadata_cache.invalidate(f"player:{ACADEMY_GENERATION}-{club_id}-")
+        index = rarity_index.get_index(ACADEMY_GENERATION)
+        index.forget(club_id)
+        await asyncio.to_thread(index.save)
+        await limiter.run(self.webhook_url, self.post_to_webhook, club_id, player_ids)
+
+    def post_to_webhook(self, club_id, player_ids):
+        numbers = ", ".join(f"{self.generation}-X-{player_id.split('-')[-1]}" for player_id in sorted(player_ids))
+        notify_queue.notify(self.webhook_url, f"ACADEMY'S REFRESHED! CLUB {club_id} QUERY NUMBER {numbers}")
+
+
+# Alerts REWARD players that appear beyond each club's known frontier (wen-rare.py)
+class RewardPlayerDetector(Detector):
+    name = "rewards"
+    fields = """
+        id
+        rarity
+        creationRating
+        potential
+        club {
+            id
+            name
+        }
+        playerAttributes {
+            age
+        }
+        imageUrls {
+            player
+            card
+            thumb
+        }
+    """
+
+    def __init__(self, webhook_url, club_ids, generation=5, first_number=181):
+        self.webhook_url = webhook_url
+        self.club_ids = list(club_ids)
+        self.generation = generation
+        self.first_number = first_number
+
+    async def evaluate_watched(self, players, limiter):
+        from bigfoot.reward_frontier import FrontierStore, advance_frontiers
+
+        async def lookup(player_ids):
+            print(f"Checking players: {', '.join(player_ids)}")
+            try:
+                return await limiter.run(GRAPHQL_ENDPOINT, get_players_metadata, player_ids, self.fields)
+            except requests.exceptions.RequestException as e:
+                print(f"Request error for {len(player_ids)} players: {e}")
+                return {}
+
+        advanced = await advance_frontiers(
+            shard.select(self.club_ids), self.generation, self.first_number, lookup, FrontierStore()
+        )
+        for club_id, (previous, frontier, player_metadata) in advanced.items():
+            print(f"New REWARD players for club {club_id}: {previous + 1} to {frontier}")
+            print(json.dumps(player_metadata, indent=4))
+            await limiter.run(self.webhook_url, self.post_to_discord, player_metadata)
+
+    def post_to_discord(self, player_metadata):
+        notify_queue.notify(self.webhook_url, "Player Metadata Found:", json.dumps(player_metadata, indent=4))
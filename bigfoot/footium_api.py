@@ -0,0 +1,225 @@
+import os
+
+from bigfoot import http_client, metrics
+from bigfoot.metadata_cache import FIELD_TTLS, get_cache
+from bigfoot.single_flight import SingleFlight
+
+# Footium GraphQL endpoint for player and club metadata
+GRAPHQL_ENDPOINT = os.getenv("FOOTIUM_GRAPHQL_ENDPOINT", "https://live.api.footium.club/api/graphql")
+
+# Academy generation queried by the scanners (CHANGE TO 3 IN SEASON 1)
+ACADEMY_GENERATION = 5
+
+# Academy slots checked for every club
+ACADEMY_SLOTS = range(7)
+
+# Largest number of aliased player lookups packed into one GraphQL document.
+# A full OpenSea page (100 clubs x 7 slots) fits in a single round trip.
+MAX_ALIASES_PER_QUERY = 700
+
+# Fields requested for each player by default
+PLAYER_FIELDS = "id rarity"
+
+# Player records by (fields, player id) and divisions by club id, looked up at
+# most once per run however many sweeps, listings and detectors ask for them
+_players = SingleFlight("players")
+_divisions = SingleFlight("divisions")
+
+
+# Function to build the id of an academy player
+def academy_player_id(club_id, player_number, generation=ACADEMY_GENERATION):
+    return f"{generation}-{club_id}-{player_number}"
+
+
+# Function to build one aliased GraphQL document covering several players
+def build_players_query(player_ids, fields=PLAYER_FIELDS):
+    variable_defs = ", ".join(f"$w{i}: PlayerWhereUniqueInput!" for i in range(len(player_ids)))
+    selections = "\n".join(
+        f"        p{i}: player(where: $w{i}) {{ {fields} }}" for i in range(len(player_ids))
+    )
+    query = f"query getPlayersMetadata({variable_defs}) {{\n{selections}\n}}"
+    variables = {f"w{i}": {"id": player_id} for i, player_id in enumerate(player_ids)}
+    return query, variables
+
+
+# Function to list the top-level field names of a GraphQL selection,
+# e.g. "id rarity club { id name }" -> ["id", "rarity", "club"]
+def top_level_fields(fields):
+    names = []
+    depth = 0
+    for token in fields.replace("{", " { ").replace("}", " } ").split():
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+        elif depth == 0:
+            names.append(token)
+    return names
+
+
+# Function to get the `data` of a GraphQL reply, or None when the request failed:
+# a non-200 status, a reply carrying `errors` or one without data. Nothing from
+# a failed reply may be taken as "not found".
+def graphql_data(response):
+    if response.status_code != 200:
+        print(f"Error {response.status_code}: {response.text}")
+        return None
+    try:
+        body = response.json()
+    except ValueError:
+        print(f"Invalid GraphQL reply: {response.text[:200]}")
+        return None
+    if not isinstance(body, dict) or body.get("errors") or not isinstance(body.get("data"), dict):
+        print(f"GraphQL error: {body.get('errors') if isinstance(body, dict) else body}")
+        return None
+    return body["data"]
+
+
+# Function to fetch metadata for many players in as few requests as possible.
+# Players already looked up with the same fields during this run, or being
+# looked up by another thread, are not requested again; fresh answers come
+# from the metadata cache and the rest are fetched live. Returns
+# {player_id: metadata}; players that do not exist map to None and players
+# from a failed request are left out. With `live`, neither this run's lookups
+# nor the cache are used, only written to.
+def get_players_metadata(player_ids, fields=PLAYER_FIELDS, live=False):
+    with metrics.span("graphql_players"):
+        if live:
+            return _fetch_players_metadata(list(dict.fromkeys(player_ids)), fields, live=True)
+        found = _players.get(
+            [(fields, player_id) for player_id in player_ids],
+            lambda keys: {
+                (fields, player_id): player
+                for player_id, player in _fetch_players_metadata([player_id for _, player_id in keys], fields).items()
+            },
+        )
+        return {player_id: player for (_, player_id), player in found.items()}
+
+
+# Function to look up players not memoized yet, from the metadata cache or live
+def _fetch_players_metadata(unique_ids, fields, live=False):
+    results = {}
+
+    # Only selections made entirely of cacheable fields are served from the cache
+    cached_fields = [name for name in top_level_fields(fields) if name != "id"]
+    cache = get_cache() if all(name in FIELD_TTLS for name in cached_fields) else None
+    if cache and not live:
+        for key, values in cache.get_many([f"player:{pid}" for pid in unique_ids], cached_fields).items():
+            player_id = key[len("player:"):]
+            results[player_id] = None if values is None else dict(values, id=player_id)
+        unique_ids = [pid for pid in unique_ids if pid not in results]
+
+    for start in range(0, len(unique_ids), MAX_ALIASES_PER_QUERY):
+        chunk = unique_ids[start:start + MAX_ALIASES_PER_QUERY]
+        query, variables = build_players_query(chunk, fields)
+        data = graphql_data(http_client.post(GRAPHQL_ENDPOINT, json={"query": query, "variables": variables}))
+        if data is None:
+            continue
+        # A null alias in an error-free reply means the player does not exist
+        fetched = {player_id: data.get(f"p{i}") for i, player_id in enumerate(chunk)}
+        results.update(fetched)
+        if cache:
+            cache.put_many({
+                f"player:{player_id}": None if player is None else {name: player.get(name) for name in cached_fields}
+                for player_id, player in fetched.items()
+            })
+    return results
+
+
+# Function to fetch academy slots for a set of clubs, grouped per club in slot order
+def get_academy_players(club_ids, generation=ACADEMY_GENERATION, fields=PLAYER_FIELDS):
+    ids_by_club = {
+        club_id: [academy_player_id(club_id, n, generation) for n in ACADEMY_SLOTS]
+        for club_id in club_ids
+    }
+    metadata = get_players_metadata([pid for ids in ids_by_club.values() for pid in ids], fields)
+    return {club_id: [metadata.get(pid) for pid in ids] for club_id, ids in ids_by_club.items()}
+
+
+# Function to check whether a player record is "Rare"
+def is_rare(player):
+    return bool(player) and player.get("rarity") == "Rare"
+
+
+# Function to find which of the given clubs have an unminted "Rare" academy player,
+# looking up every slot of every club in the same round trip
+def clubs_with_unminted_rare_player(club_ids, generation=ACADEMY_GENERATION):
+    academies = get_academy_players(club_ids, generation)
+    return {club_id for club_id, players in academies.items() if any(is_rare(player) for player in players)}
+
+
+# Function to build one aliased GraphQL document covering several clubs' divisions
+def build_divisions_query(club_ids):
+    variable_defs = ", ".join(f"$w{i}: ClubWhereUniqueInput!" for i in range(len(club_ids)))
+    selections = "\n".join(
+        f"        c{i}: club(where: $w{i}) {{ id division {{ name }} }}" for i in range(len(club_ids))
+    )
+    query = f"query getClubDivisions({variable_defs}) {{\n{selections}\n}}"
+    variables = {f"w{i}": {"id": int(club_id)} for i, club_id in enumerate(club_ids)}
+    return query, variables
+
+
+# Function to get many clubs' divisions in as few requests as possible, served
+# from the metadata cache when fresh. Returns {club_id: division name}, with
+# "Unknown Division" for clubs that could not be looked up.
+def get_club_divisions(club_ids):
+    divisions = lookup_club_divisions(club_ids)
+    return {club_id: divisions.get(club_id, "Unknown Division") for club_id in club_ids}
+
+
+# Function to get clubs' divisions like get_club_divisions, leaving out the
+# clubs that were not found or whose lookup failed. With `live`, neither this
+# run's lookups nor the cache are used, only written to.
+def lookup_club_divisions(club_ids, live=False):
+    with metrics.span("club_divisions"):
+        if live:
+            return _fetch_club_divisions(list(dict.fromkeys(club_ids)), live=True)
+        return _divisions.get(club_ids, _fetch_club_divisions)
+
+
+# Function to look up the divisions of clubs not memoized yet; clubs that were
+# not found are left out
+def _fetch_club_divisions(unique_ids, live=False):
+    divisions = {}
+    cache = get_cache()
+    if cache and not live:
+        for key, values in cache.get_many([f"club:{club_id}" for club_id in unique_ids], ["division"]).items():
+            if values:
+                divisions[key[len("club:"):]] = values["division"]
+        unique_ids = [club_id for club_id in unique_ids if club_id not in divisions]
+
+    for start in range(0, len(unique_ids), MAX_ALIASES_PER_QUERY):
+        chunk = unique_ids[start:start + MAX_ALIASES_PER_QUERY]
+        query, variables = build_divisions_query(chunk)
+        data = graphql_data(http_client.post(GRAPHQL_ENDPOINT, json={"query": query, "variables": variables}))
+        if data is None:
+            continue
+        fetched = {}
+        for i, club_id in enumerate(chunk):
+            club_data = data.get(f"c{i}")
+            if club_data:
+                fetched[club_id] = f"{(club_data.get('division') or {}).get('name', 'Unknown Division')}"
+            else:
+                print(f"Club data not found for club ID: {club_id}")
+        divisions.update(fetched)
+        if cache:
+            cache.put_many({f"club:{club_id}": {"division": division} for club_id, division in fetched.items()})
+    return divisions
+
+
+# Function to get the divisions already known locally, from this run's lookups
+# or the metadata cache, without sending a request. Unknown clubs are left out.
+def known_club_divisions(club_ids):
+    divisions = _divisions.known(club_ids)
+    missing = [club_id for club_id in club_ids if club_id not in divisions]
+    cache = get_cache()
+    if cache and missing:
+        for key, values in cache.get_many([f"club:{club_id}" for club_id in missing], ["division"]).items():
+            if values:
+                divisions[key[len("club:"):]] = values["division"]
+    return divisions
+
+
+# Function to get the club division, served from the metadata cache when fresh
+def get_club_division(club_id):
+    return get_club_divisions([club_id])[club_id]
@@ -0,0 +1,176 @@
+import json
+import os
+import sys
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from bigfoot.footium_api import ACADEMY_SLOTS
+
+# Directory holding the listing history, one sub-directory per UTC day
+HISTORY_DIR = os.getenv("HISTORY_DIR", "history")
+
+# Prices are stored in gwei so they fit an unsigned 64-bit column without
+# floats; 1 gwei is far below any price OpenSea shows
+WEI_PER_GWEI = 10 ** 9
+
+# Column name -> array typecode. Strings are dictionary-encoded per segment,
+# with code 0 meaning "unknown"
+COLUMNS = {
+    "token_id": "Q",
+    "price_gwei": "Q",
+    "seen_at": "q",
+    "division": "H",
+    **{f"rarity_{n}": "B" for n in ACADEMY_SLOTS},
+    **{f"potential_{n}": "B" for n in ACADEMY_SLOTS},
+}
+
+# Dictionary-encoded columns
+ENCODED = {"division"} | {f"rarity_{n}" for n in ACADEMY_SLOTS}
+
+
+# Function to get the partition directory of a UTC day
+def partition_dir(day, directory=HISTORY_DIR):
+    return os.path.join(directory, f"day={day}")
+
+
+# Function to append listing records to today's partition as one columnar
+# segment file: a JSON header line followed by each column's raw array bytes.
+# `records` are (token id, price in wei, division, [per-slot player or None]) tuples.
+def append_listings(records, seen_at=None, directory=HISTORY_DIR):
+    if not records:
+        return None
+    seen_at = int(seen_at or time.time())
+    columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+    dictionaries = {name: [None] for name in ENCODED}
+
+    def encode(name, value):
+        if value is None:
+            return 0
+        values = dictionaries[name]
+        if value not in values:
+            values.append(value)
+        return values.index(value)
+
+    for token_id, price_wei, division, players in records:
+        columns["token_id"].append(int(token_id))
+        columns["price_gwei"].append(int(price_wei) // WEI_PER_GWEI)
+        columns["seen_at"].append(seen_at)
+        columns["division"].append(encode("division", division))
+        for n, player in zip(ACADEMY_SLOTS, players):
+            columns[f"rarity_{n}"].append(encode(f"rarity_{n}", (player or {}).get("rarity")))
+            columns[f"potential_{n}"].append(min(255, int((player or {}).get("potential") or 0)))
+
+    day = datetime.fromtimestamp(seen_at, timezone.utc).date().isoformat()
+    partition = partition_dir(day, directory)
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, f"{seen_at}-{os.getpid()}-{time.monotonic_ns()}.seg")
+    header = {
+        "rows": len(records),
+        "byteorder": sys.byteorder,
+        "columns": list(COLUMNS),
+        "dictionaries": {name: values[1:] for name, values in dictionaries.items()},
+    }
+    # Written to a temp file first so readers never see a partial segment
+    with open(path + ".tmp", "wb") as file:
+        file.write(json.dumps(header).encode() + b"\n")
+        for name in COLUMNS:
+            columns[name].tofile(file)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+# Function to read one segment into ({column: array}, {column: [None, *values]})
+def read_segment(path, names=None):
+    with open(path, "rb") as file:
+        header = json.loads(file.readline())
+        rows = header["rows"]
+        columns = {}
+        for name in header["columns"]:
+            column = array(COLUMNS[name])
+            if names is not None and name not in names:
+                file.seek(rows * column.itemsize, os.SEEK_CUR)
+                continue
+            column.fromfile(file, rows)
+            if header["byteorder"] != sys.byteorder:
+                column.byteswap()
+            columns[name] = column
+    dictionaries = {name: [None] + values for name, values in header["dictionaries"].items()}
+    return columns, dictionaries
+
+
+# Function to load the requested columns for the last `days` UTC days into
+# one array per column. Encoded columns are remapped onto shared dictionaries,
+# returned as {column: [None, *values]}.
+def load(names, days=30, directory=HISTORY_DIR):
+    today = datetime.now(timezone.utc).date()
+    columns = {name: array(COLUMNS[name]) for name in names}
+    dictionaries = {name: [None] for name in names if name in ENCODED}
+    for offset in range(days - 1, -1, -1):
+        partition = partition_dir((today - timedelta(days=offset)).isoformat(), directory)
+        if not os.path.isdir(partition):
+            continue
+        for filename in sorted(os.listdir(partition)):
+            if not filename.endswith(".seg"):
+                continue
+            segment, segment_dictionaries = read_segment(os.path.join(partition, filename), names)
+            for name, column in segment.items():
+                if name in dictionaries:
+                    shared = dictionaries[name]
+                    remap = []
+                    for value in segment_dictionaries[name]:
+                        if value not in shared:
+                            shared.append(value)
+                        remap.append(shared.index(value))
+                    column = array(COLUMNS[name], map(remap.__getitem__, column))
+                columns[name].extend(column)
+    return columns, dictionaries
+
+
+# Function to compute the cheapest listing price, in gwei, per division
+def floors_gwei(days=30, directory=HISTORY_DIR):
+    columns, dictionaries = load(["division", "price_gwei"], days, directory)
+    floors = {}
+    for code, price in zip(columns["division"], columns["price_gwei"]):
+        if code and price and (code not in floors or price < floors[code]):
+            floors[code] = price
+    names = dictionaries["division"]
+    return {names[code]: price for code, price in floors.items()}
+
+
+# Function to compute the cheapest listing price, in ETH, per division, cheapest first
+def floor_per_division(days=30, directory=HISTORY_DIR):
+    floors = floors_gwei(days, directory)
+    return {division: price / WEI_PER_GWEI for division, price in sorted(floors.items(), key=lambda item: item[1])}
+
+
+# Function to compute, per UTC day, the share of listings with a "Rare" academy player
+def rare_hit_rate(days=30, directory=HISTORY_DIR):
+    rarity_names = [f"rarity_{n}" for n in ACADEMY_SLOTS]
+    columns, dictionaries = load(["seen_at"] + rarity_names, days, directory)
+    rare_columns = [
+        (columns[name], dictionaries[name].index("Rare"))
+        for name in rarity_names if "Rare" in dictionaries[name]
+    ]
+    totals = {}
+    hits = {}
+    for i, seen_at in enumerate(columns["seen_at"]):
+        day = seen_at // 86400
+        totals[day] = totals.get(day, 0) + 1
+        if any(column[i] == code for column, code in rare_columns):
+            hits[day] = hits.get(day, 0) + 1
+    return {
+        datetime.fromtimestamp(day * 86400, timezone.utc).date().isoformat(): hits.get(day, 0) / total
+        for day, total in sorted(totals.items())
+    }
+
+
+# Print the floor per division and the daily rare-hit rate
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    print(f"Floor per division over the last {days} days:")
+    for division, floor in floor_per_division(days).items():
+        print(f"  {division}: {floor:.4f} ETH")
+    print("Rare-hit rate per day:")
+    for day, rate in rare_hit_rate(days).items():
+        print(f"  {day}: {rate:.1%}")
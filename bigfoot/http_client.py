@@ -0,0 +1,198 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bigfoot import metrics
+
+# Sustained requests per second and burst size allowed per host
+HOST_RATE_LIMITS = {
+    "api.opensea.io": (float(os.getenv("OPENSEA_RATE_LIMIT", "4")), 4),
+    "live.api.footium.club": (float(os.getenv("FOOTIUM_RATE_LIMIT", "20")), 10),
+    "discord.com": (float(os.getenv("DISCORD_RATE_LIMIT", "2.5")), 5),
+    "discordapp.com": (float(os.getenv("DISCORD_RATE_LIMIT", "2.5")), 5),
+}
+
+# Rate limit for any host not listed above
+DEFAULT_RATE_LIMIT = (float(os.getenv("HTTP_DEFAULT_RATE_LIMIT", "10")), 10)
+
+# Hosts that rate limit each route (webhook) separately, so each path gets its own bucket
+ROUTE_SCOPED_HOSTS = {"discord.com", "discordapp.com"}
+
+# Status codes worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Retry schedule: full-jitter exponential backoff capped at BACKOFF_MAX seconds
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "4"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+# Longest Retry-After we are willing to sleep through before giving up
+MAX_RETRY_AFTER = 120.0
+
+# Seconds before a request is abandoned
+DEFAULT_TIMEOUT = 30
+
+# Connections kept alive per host
+POOL_SIZE = 32
+
+
+# Token bucket that also supports pausing the whole host after a 429
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    # Block until a token is available
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    # Stop handing out tokens for the next `seconds`
+    def pause(self, seconds):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+_session = None
+_buckets = {}
+_lock = threading.Lock()
+
+
+# Function to get the shared keep-alive session, creating it on first use
+def get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+# Function to get the token bucket for the host of `url`, or for its route on
+# hosts in ROUTE_SCOPED_HOSTS
+def get_bucket(url):
+    parsed = urlparse(url)
+    host = parsed.hostname or ""
+    key = host + parsed.path if host in ROUTE_SCOPED_HOSTS else host
+    with _lock:
+        if key not in _buckets:
+            rate, capacity = HOST_RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT)
+            _buckets[key] = TokenBucket(rate, capacity)
+        return _buckets[key]
+
+
+# Function to read how long the server asked us to wait, in seconds
+def retry_after_seconds(response):
+    value = response.headers.get("Retry-After") or response.headers.get("X-RateLimit-Reset-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# Function to compute the jittered exponential backoff for a retry attempt
+def backoff_delay(attempt):
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+# Function to count a response's status and size against its host. Streamed
+# bodies are counted by their Content-Length, since reading them here would
+# consume the stream.
+def record_response(host, response, stream):
+    metrics.count("http_requests_total", host=host, status=response.status_code)
+    size = response.headers.get("Content-Length")
+    if size is None and not stream:
+        size = len(response.content)
+    if size is not None:
+        metrics.count("http_response_bytes_total", int(size), host=host)
+
+
+# Function to send a request through the shared session with rate limiting and retries.
+# Returns the final response (which may still be an error status once retries run out)
+# and re-raises the last connection error if every attempt failed to connect.
+def request(method, url, **kwargs):
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    session = get_session()
+    bucket = get_bucket(url)
+    host = urlparse(url).hostname or ""
+
+    for attempt in range(MAX_RETRIES + 1):
+        with metrics.span("http_rate_limit_wait"):
+            bucket.acquire()
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            metrics.count("http_requests_total", host=host, status=type(e).__name__)
+            if attempt == MAX_RETRIES:
+                raise
+            metrics.count("http_retries_total", host=host, reason=type(e).__name__)
+            time.sleep(backoff_delay(attempt))
+            continue
+        finally:
+            metrics.count("http_request_seconds_total", time.perf_counter() - started, host=host)
+        record_response(host, response, kwargs.get("stream"))
+
+        # Discord reports an exhausted bucket before we hit a 429
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset_after = retry_after_seconds(response)
+            if reset_after:
+                bucket.pause(reset_after)
+
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return response
+
+        delay = retry_after_seconds(response)
+        if delay is None:
+            delay = backoff_delay(attempt)
+        elif delay > MAX_RETRY_AFTER:
+            return response
+        print(f"Retrying {method} {host} after {response.status_code} in {delay:.1f}s")
+        metrics.count("http_retries_total", host=host, reason=response.status_code)
+        # An unread streamed body holds its pooled connection until closed
+        response.close()
+        if response.status_code == 429:
+            bucket.pause(delay)
+        else:
+            time.sleep(delay)
+    return response
+
+
+# Function to send a GET request through the shared client
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+# Function to send a POST request through the shared client
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
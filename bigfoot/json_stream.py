@@ -0,0 +1,105 @@
+import codecs
+import json
+
+# Bytes read from the response per chunk
+CHUNK_SIZE = 16 * 1024
+
+# Consumed text is dropped from the buffer once this many characters pile up
+_COMPACT_AT = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+# Characters that can continue a number, e.g. "1" + ".5" or "1" + "e3"
+_NUMBER_CHARACTERS = "0123456789.eE+-"
+
+
+# Incremental reader for a JSON object whose `key` holds a large array. Iterating
+# yields the array's items one at a time as the bytes arrive, so the whole
+# document is never held in memory; the object's other top-level values are
+# collected in `meta`. Raises ValueError for a document that is not valid JSON.
+class JsonArrayStream:
+    def __init__(self, chunks, key):
+        self.chunks = iter(chunks)
+        self.key = key
+        self.meta = {}
+        self.found = False
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    # Read one more chunk into the buffer; False once the response is exhausted
+    def _fill(self):
+        if self._eof:
+            return False
+        if self._pos > _COMPACT_AT:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        for chunk in self.chunks:
+            text = self._utf8.decode(chunk)
+            if text:
+                self._buffer += text
+                return True
+        self._buffer += self._utf8.decode(b"", final=True)
+        self._eof = True
+        return False
+
+    # Skip whitespace and return the next character without consuming it ("" at the end)
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, characters):
+        character = self._peek()
+        if not character or character not in characters:
+            raise ValueError(f"Expected one of {characters!r} at offset {self._pos}, got {character!r}")
+        self._pos += 1
+        return character
+
+    # Decode the next complete JSON value. A number may still be cut short at a
+    # chunk boundary ("1" of "1.5", "1" of "1e3"), so it is only accepted once a
+    # character that cannot continue it follows, or at EOF.
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                if self._eof or (end < len(self._buffer) and (
+                    self._buffer[self._pos] not in _NUMBER_CHARACTERS
+                    or self._buffer[end] not in _NUMBER_CHARACTERS
+                )):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def __iter__(self):
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            name = self._value()
+            self._expect(":")
+            if name == self.key and self._peek() == "[":
+                self.found = True
+                self._pos += 1
+                if self._peek() == "]":
+                    self._pos += 1
+                else:
+                    while True:
+                        yield self._value()
+                        if self._expect(",]") == "]":
+                            break
+            else:
+                self.meta[name] = self._value()
+            if self._expect(",}") == "}":
+                return
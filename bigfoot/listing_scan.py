@@ -0,0 +1,232 @@
+import asyncio
+import heapq
+import os
+import time
+
+from bigfoot import deal_scoring, metrics, notify_queue, rarity_index, shard
+from bigfoot.footium_api import GRAPHQL_ENDPOINT, get_club_divisions, known_club_divisions
+from bigfoot.scan_checkpoint import ScanCheckpoint
+from bigfoot.scanner import HostLimiter, run_scan, scan_listing_events, scan_listing_pages
+from bigfoot.sync_state import get_watermark, set_watermark
+
+# Seconds of overlap re-read before the watermark, to tolerate late-indexed events
+WATERMARK_OVERLAP = 120
+
+# Set FULL_SCAN=1 to ignore the watermark and walk every active listing
+FULL_SCAN = os.getenv("FULL_SCAN") == "1"
+
+# Times a failed listing walk is resumed from its checkpoint within the same
+# run, RESUME_DELAY seconds apart, before it is left for the next run
+RESUME_ATTEMPTS = int(os.getenv("SCAN_RESUME_ATTEMPTS", "2"))
+RESUME_DELAY = float(os.getenv("SCAN_RESUME_DELAY", "10"))
+
+# Seconds from the start of the listing scan during which listings are checked,
+# best deals first; the rest stay pending for the next run. 0 checks them all.
+EVALUATION_BUDGET = float(os.getenv("LISTING_EVALUATION_BUDGET", "0"))
+
+# Seconds the walk only collects listings before the first batch is checked,
+# so the first batches are the best of many pages rather than the first page
+# in OpenSea's order; checking starts earlier once the walk is done. 0 starts
+# checking as soon as the first page is queued.
+COLLECTION_WINDOW = float(os.getenv("LISTING_COLLECTION_WINDOW", "30"))
+
+# Queued listings checked per batch of academy lookups
+EVALUATION_BATCH = int(os.getenv("LISTING_EVALUATION_BATCH", "100"))
+
+# URL whose host bounds concurrent webhook posts in the HostLimiter
+DISCORD_URL = "https://discord.com/api/webhooks"
+
+# First line of the Discord message for a rare academy listing
+DEFAULT_TITLE = "New club with academy rare listed:"
+
+
+# Function to alert the rows whose club is in `rare_clubs` and that were not posted
+# before, scoring each against its division floor and alerting only good deals.
+# `notify(opensea_url, footium_url, eth_price, division)` queues one alert and
+# `on_posted()` runs after each new alert has been recorded.
+async def alert_rare_listings(rows, rare_clubs, limiter, dedup, notify, on_posted=None):
+    rare_listings = {(token, identifier, order_hash): price
+                     for identifier, token, price, order_hash in rows if identifier in rare_clubs}
+
+    # Skip listings that were already posted before looking up their division
+    with metrics.span("dedup"):
+        hits = dedup.unseen(rare_listings)
+    metrics.count("dedup_skipped_total", len(rare_listings) - len(hits))
+    if not hits:
+        return
+
+    divisions = await limiter.run(GRAPHQL_ENDPOINT, get_club_divisions, [identifier for _, identifier, _ in hits])
+    hit_divisions = [divisions[identifier] for _, identifier, _ in hits]
+    scores = deal_scoring.score_listings([rare_listings[key] for key in hits], hit_divisions)
+
+    new_hits = []
+    for i in deal_scoring.passing(scores):
+        key = hits[i]
+        token, identifier, _ = key
+        opensea_url = f"https://opensea.io/assets/arbitrum/{token}/{identifier}"
+        footium_url = f"https://footium.club/game/club/{identifier}"
+        eth_price = rare_listings[key] / (10 ** 18)  # Adjust for ETH (wei to ETH)
+        new_hits.append((key, opensea_url, footium_url, eth_price, hit_divisions[i]))
+    if len(new_hits) < len(hits):
+        print(f"Skipped {len(hits) - len(new_hits)} rare listings scoring below {deal_scoring.SCORE_THRESHOLD}.")
+        metrics.count("deals_below_threshold_total", len(hits) - len(new_hits))
+
+    # Queue the alerts for the Discord sender
+    await asyncio.gather(*(limiter.run(DISCORD_URL, notify, *hit[1:]) for hit in new_hits))
+
+    with metrics.span("dedup"):
+        for key, opensea_url, footium_url, _, _ in new_hits:
+            # Add the listing to the dedup store
+            dedup.add(*key, opensea_url, footium_url)
+            if on_posted:
+                on_posted()
+
+
+# Listings waiting for their academy lookups, best expected deal first: the
+# highest score against the division floor, then the lowest price. Divisions
+# only come from what is known locally (this run's lookups, the metadata
+# cache, the rarity index), so ranking a page sends no request.
+class EvaluationQueue:
+    def __init__(self):
+        self.heap = []
+        self.pushed = 0
+        self.closed = False
+        self.ready = asyncio.Event()
+        self.done = asyncio.Event()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, listings):
+        if not listings:
+            return
+        club_ids = [listing.identifier for listing in listings]
+        divisions = known_club_divisions(club_ids)
+        index = rarity_index.get_index()
+        for club_id in club_ids:
+            if club_id not in divisions:
+                entry = index.lookup(club_id)
+                divisions[club_id] = entry[2] if entry else None
+        scores = deal_scoring.priorities(
+            [listing.price for listing in listings], [divisions[club_id] for club_id in club_ids]
+        )
+        for listing, score in zip(listings, scores):
+            heapq.heappush(self.heap, (-score, listing.price, self.pushed, listing))
+            self.pushed += 1
+        self.ready.set()
+
+    # Take up to `size` of the best listings
+    def pop(self, size):
+        return [heapq.heappop(self.heap)[-1] for _ in range(min(size, len(self.heap)))]
+
+    # Mark that no more listings will be pushed
+    def close(self):
+        self.closed = True
+        self.ready.set()
+        self.done.set()
+
+    # Wait until the walk is done or `timeout` seconds have passed
+    async def collect(self, timeout):
+        try:
+            await asyncio.wait_for(self.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+# Function to walk new listings, incrementally from the named watermark when one
+# exists and through every active listing otherwise. The walk only collects
+# listings into an EvaluationQueue; after COLLECTION_WINDOW, or once the walk
+# is done, batches of the best queued listings go to `handle_page(rows,
+# limiter)`, which returns the rows it could not check yet, until the queue is
+# empty or EVALUATION_BUDGET (which includes the window) runs out.
+# Everything not checked stays pending in the checkpoint, which also records
+# the walk's progress after every page, so a failed walk is resumed, in this
+# run up to RESUME_ATTEMPTS times and otherwise by the next run.
+def scan_new_listings(watermark_name, handle_page, full_scan=FULL_SCAN):
+    since = None if full_scan else get_watermark(watermark_name)
+    checkpoint = ScanCheckpoint(watermark_name)
+    if since is None:
+        resumed = checkpoint.begin("pages")
+    else:
+        resumed = checkpoint.begin("events", since - WATERMARK_OVERLAP)
+    deadline = time.monotonic() + EVALUATION_BUDGET if EVALUATION_BUDGET else None
+
+    async def evaluate(queue, limiter):
+        if COLLECTION_WINDOW:
+            await queue.collect(COLLECTION_WINDOW)
+        while True:
+            await queue.ready.wait()
+            queue.ready.clear()
+            while queue:
+                if deadline and time.monotonic() > deadline:
+                    return
+                rows = queue.pop(EVALUATION_BATCH)
+                deferred = await handle_page(rows, limiter) or []
+                checkpoint.resolve([row for row in rows if row not in deferred])
+                if deferred:
+                    print(f"Deferring {len(deferred)} listings whose lookups failed to the next run.")
+            if queue.closed:
+                return
+
+    async def scan(limiter):
+        queue = EvaluationQueue()
+
+        async def enqueue(rows):
+            rows = [row for row in rows if shard.owns(row.identifier)]
+            checkpoint.defer(rows)
+            queue.push(rows)
+
+        evaluation = asyncio.ensure_future(evaluate(queue, limiter))
+        pending = checkpoint.pending_listings()
+        try:
+            if pending:
+                print(f"Queueing {len(pending)} listings left unchecked by an earlier run.")
+                await enqueue(pending)
+            if since is None:
+                if not resumed:
+                    print("No watermark found, walking every active listing.")
+                ok = await scan_listing_pages(enqueue, limiter, checkpoint)
+                return checkpoint.started_at if ok else None
+            print(f"Fetching listings created since {since}.")
+            return await scan_listing_events(enqueue, limiter, checkpoint.since, checkpoint)
+        finally:
+            queue.close()
+            await evaluation
+            if queue:
+                print(f"Evaluation budget of {EVALUATION_BUDGET:g}s used up; "
+                      f"{len(queue)} listings left for the next run.")
+                metrics.count("listings_over_budget_total", len(queue))
+            checkpoint.save()
+
+    for attempt in range(RESUME_ATTEMPTS + 1):
+        if attempt:
+            print(f"Listing walk failed, resuming from its checkpoint in {RESUME_DELAY:g}s.")
+            time.sleep(RESUME_DELAY)
+        cursor = checkpoint.cursor
+        watermark = run_scan(scan, HostLimiter())
+        if watermark is not None:
+            break
+        # A stored cursor that fails straight away may have expired; go back
+        # to the first page, skipping the listings already handled
+        if cursor and checkpoint.cursor == cursor:
+            checkpoint.restart()
+    else:
+        checkpoint.save()
+        print("Listing walk failed; the next run resumes it from the checkpoint.")
+        return
+
+    # Only move the watermark forward once every page was walked; listings
+    # not checked yet are still pending in the checkpoint
+    set_watermark(watermark_name, max(watermark, since or 0))
+    checkpoint.finish()
+
+
+# Function to queue a rare listing alert for the Discord webhook
+def post_to_webhook(opensea_url, footium_url, eth_price, division, webhook_url=None, title=DEFAULT_TITLE):
+    message = (
+        f"OpenSea URL: {opensea_url}\n"
+        f"Footium URL: {footium_url}\n"
+        f"Price: {eth_price:.4f} ETH\n"
+        f"Club Division: {division}\n"
+    )
+    notify_queue.notify(webhook_url, title, message)
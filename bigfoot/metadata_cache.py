@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+import time
+
+from bigfoot import metrics, state_db
+
+DAY = 24 * 60 * 60
+
+# How long each cached field stays fresh, in seconds. Fields not listed here
+# are never cached and always fetched live.
+FIELD_TTLS = {
+    "rarity": 30 * DAY,
+    "creationRating": 30 * DAY,
+    "potential": 30 * DAY,
+    "club": 7 * DAY,
+    "division": DAY,  # Only changes at season boundaries
+}
+
+# How long a "player not found" answer is remembered
+MISSING_TTL = 60 * 60
+
+# Marker field stored for negatively cached keys
+MISSING = "__missing__"
+
+# Rows kept before the least recently used ones are evicted
+MAX_ENTRIES = int(os.getenv("METADATA_CACHE_MAX_ENTRIES", "200000"))
+
+# Set METADATA_CACHE=0 to always fetch live data
+ENABLED = os.getenv("METADATA_CACHE", "1") != "0"
+
+# SQLite caps the number of bound parameters per statement
+_CHUNK = 500
+
+
+# Persistent per-field TTL cache for player and club metadata, stored in the
+# cache database and evicted least-recently-used beyond MAX_ENTRIES rows
+class MetadataCache:
+    def __init__(self, connection=None):
+        self.connection = connection or state_db.connect_cache()
+        self.lock = state_db.lock
+        with self.lock, self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS metadata_cache (
+                    key TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    value TEXT,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (key, field)
+                )
+                """
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS metadata_cache_last_access ON metadata_cache (last_access)"
+            )
+        self.prune()
+
+    # Return {key: {field: value}} for keys whose requested fields are all fresh,
+    # and {key: None} for keys cached as not found. Other keys are left out.
+    def get_many(self, keys, fields):
+        now = time.time()
+        keys = list(dict.fromkeys(keys))
+        cached = {}
+        with self.lock:
+            for start in range(0, len(keys), _CHUNK):
+                chunk = keys[start:start + _CHUNK]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self.connection.execute(
+                    f"SELECT key, field, value FROM metadata_cache "
+                    f"WHERE key IN ({placeholders}) AND expires_at > ?",
+                    chunk + [now],
+                )
+                for key, field, value in rows:
+                    cached.setdefault(key, {})[field] = value
+
+            results = {}
+            for key, values in cached.items():
+                if MISSING in values:
+                    results[key] = None
+                elif all(field in values for field in fields):
+                    results[key] = {field: json.loads(values[field]) for field in fields}
+
+            if results:
+                with self.connection:
+                    self.connection.executemany(
+                        "UPDATE metadata_cache SET last_access = ? WHERE key = ?",
+                        [(now, key) for key in results],
+                    )
+        metrics.count("cache_lookups_total", len(results), cache="metadata", result="hit")
+        metrics.count("cache_lookups_total", len(keys) - len(results), cache="metadata", result="miss")
+        return results
+
+    # Store {key: {field: value}} entries; a None entry caches the key as not found
+    def put_many(self, entries):
+        now = time.time()
+        rows = []
+        found = []
+        for key, values in entries.items():
+            if values is None:
+                rows.append((key, MISSING, None, now + MISSING_TTL, now))
+                continue
+            found.append((key,))
+            for field, value in values.items():
+                ttl = FIELD_TTLS.get(field)
+                if ttl:
+                    rows.append((key, field, json.dumps(value), now + ttl, now))
+        with self.lock, self.connection:
+            self.connection.executemany(
+                f"DELETE FROM metadata_cache WHERE key = ? AND field = '{MISSING}'", found
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO metadata_cache VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+    # Drop every cached key starting with `prefix` (everything by default)
+    def invalidate(self, prefix=""):
+        with self.lock, self.connection:
+            deleted = self.connection.execute(
+                "DELETE FROM metadata_cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            ).rowcount
+        print(f"Invalidated {deleted} cached metadata fields for '{prefix}*'.")
+
+    # Remove expired rows, then evict least recently used rows beyond max_entries
+    def prune(self, max_entries=MAX_ENTRIES):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM metadata_cache WHERE expires_at <= ?", (time.time(),))
+            self.connection.execute(
+                """
+                DELETE FROM metadata_cache WHERE rowid IN (
+                    SELECT rowid FROM metadata_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (max_entries,),
+            )
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+# Function to get the shared metadata cache, or None when caching is disabled
+def get_cache():
+    global _cache
+    if not ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = MetadataCache()
+        return _cache
+
+
+# Function to drop cached keys starting with `prefix` from the shared cache
+def invalidate(prefix=""):
+    cache = get_cache()
+    if cache:
+        cache.invalidate(prefix)
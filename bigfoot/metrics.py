@@ -0,0 +1,150 @@
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Path the JSON run summary is written to; it is printed when unset
+METRICS_FILE = os.getenv("METRICS_FILE")
+
+# Optional Prometheus text-format export, e.g. for node_exporter's textfile collector
+PROMETHEUS_FILE = os.getenv("METRICS_PROMETHEUS_FILE")
+
+# Pass --profile (or set PROFILE=1) to run under cProfile
+PROFILE = "--profile" in sys.argv[1:] or os.getenv("PROFILE") == "1"
+
+# Where the cProfile stats are saved, and how many of the slowest functions are printed
+PROFILE_FILE = os.getenv("PROFILE_FILE", "bigfoot.prof")
+PROFILE_TOP = 25
+
+# Prefix of every exported Prometheus metric
+PREFIX = "bigfoot_"
+
+_lock = threading.Lock()
+_started = time.time()
+# (name, sorted label items) -> value
+_counters = {}
+# stage name -> [calls, total seconds, slowest call in seconds]
+_spans = {}
+
+
+# Function to add `value` to the counter `name` with the given labels
+def count(name, value=1, **labels):
+    key = (name, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+# Function to time a stage of the run. Stages running concurrently in several
+# threads each add their own time, so a stage's total can exceed the wall time.
+@contextmanager
+def span(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _lock:
+            stats = _spans.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+
+
+# Function to build the structured summary of everything recorded so far
+def summary():
+    with _lock:
+        counters = {}
+        for (name, labels), value in sorted(_counters.items()):
+            counters.setdefault(name, []).append(dict(labels, value=round(value, 6)))
+        spans = {
+            name: {"calls": calls, "total_s": round(total, 6), "max_s": round(slowest, 6)}
+            for name, (calls, total, slowest) in sorted(_spans.items(), key=lambda item: -item[1][1])
+        }
+    return {
+        "script": os.path.basename(sys.argv[0]),
+        "started_at": int(_started),
+        "wall_s": round(time.time() - _started, 3),
+        "spans": spans,
+        "counters": counters,
+    }
+
+
+# Function to add the counters and spans of another run's `summary()`, e.g.
+# one shard of a sharded run, to this process's
+def absorb(other):
+    for name, samples in other.get("counters", {}).items():
+        for sample in samples:
+            labels = dict(sample)
+            count(name, labels.pop("value"), **labels)
+    with _lock:
+        for name, other_stats in other.get("spans", {}).items():
+            stats = _spans.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += other_stats["calls"]
+            stats[1] += other_stats["total_s"]
+            stats[2] = max(stats[2], other_stats["max_s"])
+
+
+# Function to render the recorded spans and counters in Prometheus text format
+def to_prometheus():
+    def escape(value):
+        return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    def sample(name, labels, value):
+        rendered = ",".join(f'{label}="{escape(label_value)}"' for label, label_value in labels)
+        return f"{PREFIX}{name}{{{rendered}}} {value}" if rendered else f"{PREFIX}{name} {value}"
+
+    script = (("script", os.path.basename(sys.argv[0])),)
+    lines = [f"# TYPE {PREFIX}wall_seconds gauge", sample("wall_seconds", script, round(time.time() - _started, 3))]
+    with _lock:
+        by_name = {}
+        for (name, labels), value in sorted(_counters.items()):
+            by_name.setdefault(name, []).append((script + labels, value))
+        for name, samples in by_name.items():
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            lines.extend(sample(name, labels, round(value, 6)) for labels, value in samples)
+        if _spans:
+            for metric, index in (("stage_calls_total", 0), ("stage_seconds_total", 1), ("stage_seconds_max", 2)):
+                lines.append(f"# TYPE {PREFIX}{metric} {'gauge' if metric.endswith('max') else 'counter'}")
+                lines.extend(
+                    sample(metric, script + (("stage", name),), round(stats[index], 6))
+                    for name, stats in sorted(_spans.items())
+                )
+    return "\n".join(lines) + "\n"
+
+
+# Function to write `text` to `path` atomically, so scrapers never read half a file
+def _write(path, text):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as file:
+        file.write(text)
+    os.replace(temp_path, path)
+
+
+# Function to emit the run summary as JSON, plus the Prometheus file when configured
+def report(metrics_file=METRICS_FILE, prometheus_file=PROMETHEUS_FILE):
+    text = json.dumps(summary(), indent=2)
+    if metrics_file:
+        _write(metrics_file, text + "\n")
+        print(f"Wrote run metrics to {metrics_file}.")
+    else:
+        print(f"Run metrics:\n{text}")
+    if prometheus_file:
+        _write(prometheus_file, to_prometheus())
+
+
+# Function to call `func`, under cProfile when profiling is switched on, and
+# print the functions that took the most cumulative time
+def profiled(func, *args, profile=PROFILE, **kwargs):
+    if not profile:
+        return func(*args, **kwargs)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(PROFILE_FILE)
+        print(f"Saved profile to {PROFILE_FILE}; slowest functions by cumulative time:")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(PROFILE_TOP)
@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+import time
+
+import requests
+
+from bigfoot import http_client, metrics, shard, state_db
+
+# Discord accepts at most 10 embeds and 6000 embed characters per message
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000
+MAX_DESCRIPTION = 4096
+
+# Seconds the end of a run waits for queued alerts to be delivered; whatever
+# is left stays queued for the next run
+FLUSH_TIMEOUT = float(os.getenv("NOTIFY_FLUSH_TIMEOUT", "60"))
+
+# Backoff before retrying a failed delivery, doubled per attempt up to RETRY_DELAY_MAX
+RETRY_DELAY = 5
+RETRY_DELAY_MAX = 300
+
+# Statuses that mean the alert can never be delivered (bad payload, webhook deleted)
+DROP_STATUSES = {400, 401, 403, 404}
+
+# Environment variables holding the Discord webhook URLs. A queued alert only
+# stores the variable's name; the URL carries the webhook's secret token, so
+# it is looked up when the alert is sent and never written to the state
+# database, which is committed to the repository.
+WEBHOOK_VARIABLES = ("DISCORD_WEBHOOK_URL", "DISCORD_WEBHOOK_URL2")
+
+
+# Function to get the name of the environment variable holding `webhook_url`, or None
+def webhook_variable(webhook_url):
+    return next((name for name in WEBHOOK_VARIABLES if webhook_url and os.getenv(name) == webhook_url), None)
+
+
+# Function to build one Discord embed, trimmed to Discord's size limits
+def make_embed(title, description=""):
+    embed = {"title": title[:256]}
+    if description:
+        embed["description"] = description[:MAX_DESCRIPTION]
+    return embed
+
+
+# Function to count the characters Discord charges an embed against MAX_EMBED_CHARS
+def embed_size(embed):
+    return len(embed.get("title", "")) + len(embed.get("description", ""))
+
+
+# Durable outbound queue of Discord alerts, stored in the state database. The
+# scan only enqueues; a background sender drains the queue, packing up to
+# MAX_EMBEDS alerts for the same webhook into one message. Alerts name their
+# webhook by its WEBHOOK_VARIABLES entry, never by URL. Alerts are deleted
+# only once Discord accepted them, so they survive a crash. In a sharded run
+# each shard sends the alerts it queued itself plus its share of the ones
+# left over from earlier runs, so no alert goes out twice.
+class NotificationQueue:
+    def __init__(self, connection=None):
+        self.connection = connection or state_db.connect()
+        self.lock = state_db.lock
+        self.wake = threading.Event()
+        self.sender = None
+        with self.lock, self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS outbound_alerts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    webhook TEXT NOT NULL,
+                    embed TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt REAL NOT NULL
+                )
+                """
+            )
+            # AUTOINCREMENT ids only grow, so alerts queued from now on have larger ids
+            last_id, = self.connection.execute("SELECT COALESCE(MAX(id), 0) FROM outbound_alerts").fetchone()
+        self.owned = ("(id > ? OR id % ? = ?)", (last_id, shard.COUNT, shard.INDEX))
+
+    # Queue an embed for `webhook_url`, which has to be one of WEBHOOK_VARIABLES'
+    # values, and wake the sender
+    def enqueue(self, webhook_url, embed):
+        webhook = webhook_variable(webhook_url)
+        if webhook is None:
+            print(f"No webhook URL configured in {' or '.join(WEBHOOK_VARIABLES)}, "
+                  f"dropping alert: {embed.get('title')}")
+            return
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO outbound_alerts (webhook, embed, created_at, next_attempt) VALUES (?, ?, ?, ?)",
+                (webhook, json.dumps(embed), now, now),
+            )
+        self.start()
+        self.wake.set()
+
+    # Number of alerts not delivered yet
+    def pending(self):
+        with self.lock:
+            owned, params = self.owned
+            return self.connection.execute(f"SELECT COUNT(*) FROM outbound_alerts WHERE {owned}", params).fetchone()[0]
+
+    # Start the background sender if it is not running
+    def start(self):
+        with self.lock:
+            if self.sender is None:
+                self.sender = threading.Thread(target=self._send_forever, name="discord-sender", daemon=True)
+                self.sender.start()
+
+    # Wait up to `timeout` seconds for every queued alert to be delivered
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        if not self.pending():
+            return
+        self.start()
+        self.wake.set()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.pending():
+                return
+            time.sleep(0.2)
+        print(f"{self.pending()} alerts left queued for the next run.")
+
+    # Return (webhook variable, [(id, embed)]) for the oldest due alerts of one
+    # webhook, or (None, seconds until the next alert is due)
+    def _next_batch(self):
+        now = time.time()
+        owned, params = self.owned
+        with self.lock:
+            row = self.connection.execute(
+                f"SELECT webhook, next_attempt FROM outbound_alerts WHERE {owned} "
+                "ORDER BY next_attempt, id LIMIT 1",
+                params,
+            ).fetchone()
+            if row is None:
+                return None, None
+            webhook, next_attempt = row
+            if next_attempt > now:
+                return None, next_attempt - now
+            rows = self.connection.execute(
+                f"SELECT id, embed FROM outbound_alerts WHERE webhook = ? AND next_attempt <= ? AND {owned} "
+                "ORDER BY id LIMIT ?",
+                (webhook, now) + params + (MAX_EMBEDS,),
+            ).fetchall()
+
+        batch = []
+        size = 0
+        for alert_id, embed in rows:
+            embed = json.loads(embed)
+            size += embed_size(embed)
+            if batch and size > MAX_EMBED_CHARS:
+                break
+            batch.append((alert_id, embed))
+        return webhook, batch
+
+    def _send_forever(self):
+        while True:
+            webhook, batch = self._next_batch()
+            if webhook is None:
+                self.wake.wait(batch)
+                self.wake.clear()
+                continue
+            self._send(webhook, batch)
+
+    # Post one coalesced message to the URL in the `webhook` environment variable;
+    # http_client paces each webhook route and honours Discord's rate-limit headers
+    def _send(self, webhook, batch):
+        ids = [(alert_id,) for alert_id, _ in batch]
+        webhook_url = os.getenv(webhook)
+        status = None
+        if not webhook_url:
+            print(f"{webhook} is not set, keeping {len(batch)} alerts queued.")
+        else:
+            try:
+                with metrics.span("discord_send"):
+                    response = http_client.post(webhook_url, json={"embeds": [embed for _, embed in batch]})
+                status = response.status_code
+            except requests.exceptions.RequestException as e:
+                print(f"Error sending {len(batch)} alerts to Discord: {e}")
+
+        with self.lock, self.connection:
+            if status is not None and 200 <= status < 300:
+                print(f"Sent {len(batch)} alerts to Discord webhook.")
+                metrics.count("alerts_total", len(batch), outcome="sent")
+                self.connection.executemany("DELETE FROM outbound_alerts WHERE id = ?", ids)
+            elif status in DROP_STATUSES:
+                print(f"Discord rejected {len(batch)} alerts with status {status}, dropping them.")
+                metrics.count("alerts_total", len(batch), outcome="dropped")
+                self.connection.executemany("DELETE FROM outbound_alerts WHERE id = ?", ids)
+            else:
+                print(f"Failed to send {len(batch)} alerts to Discord (status {status}), will retry.")
+                metrics.count("alerts_total", len(batch), outcome="retried")
+                self.connection.executemany(
+                    "UPDATE outbound_alerts SET attempts = attempts + 1, "
+                    "next_attempt = ? + min(?, ? * (1 << attempts)) WHERE id = ?",
+                    [(time.time(), RETRY_DELAY_MAX, RETRY_DELAY, alert_id) for alert_id, in ids],
+                )
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+# Function to get the shared notification queue
+def get_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = NotificationQueue()
+        return _queue
+
+
+# Function to queue a Discord alert for `webhook_url`
+def notify(webhook_url, title, description=""):
+    get_queue().enqueue(webhook_url, make_embed(title, description))
+
+
+# Function to wait for queued alerts to be delivered before the process exits
+def flush(timeout=FLUSH_TIMEOUT):
+    get_queue().flush(timeout)
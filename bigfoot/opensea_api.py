@@ -0,0 +1,139 @@
+import os
+
+import requests
+
+from bigfoot import http_client, metrics
+from bigfoot.json_stream import CHUNK_SIZE, JsonArrayStream
+
+# OpenSea API Key from GitHub Secrets
+API_KEY = os.getenv("OPENSEA_API_KEY")
+
+# Footium Clubs collection slug (from the OpenSea URL: https://opensea.io/collection/footium-clubs)
+COLLECTION_SLUG = "footium-clubs"
+
+# OpenSea API base URL, overridable to point the scanners at a local stand-in
+OPENSEA_API_URL = os.getenv("OPENSEA_API_URL", "https://api.opensea.io")
+
+# URL to fetch all active listings for the collection
+LISTINGS_URL = f"{OPENSEA_API_URL}/api/v2/listings/collection/{COLLECTION_SLUG}/all"
+
+# Max number of listings to return per page (between 1 and 100)
+PAGE_LIMIT = 100
+
+# URL to fetch the collection's event feed, newest first
+EVENTS_URL = f"{OPENSEA_API_URL}/api/v2/events/collection/{COLLECTION_SLUG}"
+
+# Max number of events to return per page (between 1 and 50)
+EVENTS_PAGE_LIMIT = 50
+
+# OpenSea Stream API websocket (Phoenix channels protocol)
+STREAM_URL = f"wss://stream.openseabeta.com/socket/websocket?token={API_KEY}"
+
+headers = {
+    "accept": "application/json",
+    "x-api-key": API_KEY
+}
+
+
+# Compact record of one listing: only the fields the scanners read. Unpacks
+# like the (identifier, token, price in wei, order hash) rows used everywhere.
+class Listing:
+    __slots__ = ("identifier", "token", "price", "order_hash", "expires_at", "listed_at")
+
+    def __init__(self, identifier, token, price, order_hash="", expires_at=None, listed_at=None):
+        self.identifier = identifier
+        self.token = token
+        self.price = price
+        self.order_hash = order_hash
+        self.expires_at = expires_at
+        self.listed_at = listed_at
+
+    def __iter__(self):
+        return iter((self.identifier, self.token, self.price, self.order_hash))
+
+    def __repr__(self):
+        return f"Listing({self.identifier!r}, {self.token!r}, {self.price!r}, {self.order_hash!r})"
+
+
+# One page of parsed listings, its `next` cursor and how many entries were malformed
+class ListingPage:
+    def __init__(self, listings, next_cursor, malformed, found):
+        self.listings = listings
+        self.next = next_cursor
+        self.malformed = malformed
+        self.found = found
+
+
+# Function to stream the `key` array of a JSON page into Listing records, one raw
+# entry at a time, counting the entries `parse` rejects
+def read_listing_page(chunks, key, parse):
+    stream = JsonArrayStream(chunks, key)
+    listings = []
+    malformed = 0
+    for raw in stream:
+        try:
+            listings.append(parse(raw))
+        except (AttributeError, KeyError, IndexError, TypeError, ValueError):
+            malformed += 1
+    return ListingPage(listings, stream.meta.get('next'), malformed, stream.found)
+
+
+# Function to GET an OpenSea page and stream it into a ListingPage, or None on error
+def get_listing_page(url, params, key, parse):
+    with metrics.span("opensea_page"):
+        try:
+            with http_client.get(url, headers=headers, params=params, stream=True) as response:
+                if response.status_code == 200:
+                    return read_listing_page(response.iter_content(CHUNK_SIZE), key, parse)
+                print(f"Error: {response.status_code}")
+                print(response.text)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Error reading {url}: {e}")
+        return None
+
+
+# Function to fetch one page of listings, starting at the given `next` cursor
+def get_listings_page(cursor=None):
+    params = {"limit": PAGE_LIMIT}
+    if cursor:
+        params["next"] = cursor
+    return get_listing_page(LISTINGS_URL, params, 'listings', parse_listing)
+
+
+# Function to turn a raw listing into a Listing.
+# Raises KeyError/IndexError for malformed listings.
+def parse_listing(listing):
+    parameters = listing['protocol_data']['parameters']
+    offer = parameters['offer'][0]
+    price = parameters['consideration'][0]['startAmount']  # Get listing price
+    end_time = parameters.get('endTime')
+    return Listing(
+        offer['identifierOrCriteria'], offer['token'], int(price), listing.get('order_hash', ""),
+        int(end_time) if end_time else None,
+    )
+
+
+# Function to fetch one page of listing events created after the `after` unix timestamp
+def get_listing_events_page(after, cursor=None):
+    params = {"event_type": "listing", "after": int(after), "limit": EVENTS_PAGE_LIMIT}
+    if cursor:
+        params["next"] = cursor
+    return get_listing_page(EVENTS_URL, params, 'asset_events', parse_listing_event)
+
+
+# Function to turn a listing event into a Listing, matching parse_listing.
+# Raises KeyError/TypeError for malformed events.
+def parse_listing_event(event):
+    asset = event.get('asset') or event['nft']
+    return Listing(
+        asset['identifier'], asset['contract'], int(event['payment']['quantity']), event.get('order_hash', ""),
+        event.get('expiration_date'), event.get('event_timestamp'),
+    )
+
+
+# Function to turn a Stream API item_listed message payload into a Listing,
+# matching parse_listing. Raises KeyError/TypeError/ValueError for malformed messages.
+def parse_stream_event(payload):
+    event = payload['payload']
+    _, contract, identifier = event['item']['nft_id'].split("/")
+    return Listing(identifier, contract, int(event['base_price']), event.get('order_hash', ""))
@@ -0,0 +1,255 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+
+import requests
+
+from bigfoot import metrics, shard, state_db
+from bigfoot.footium_api import (
+    ACADEMY_GENERATION,
+    ACADEMY_SLOTS,
+    GRAPHQL_ENDPOINT,
+    MAX_ALIASES_PER_QUERY,
+    academy_player_id,
+    get_players_metadata,
+    is_rare,
+    lookup_club_divisions,
+)
+from bigfoot.scanner import HostLimiter, run_scan
+
+# Seconds an index entry is trusted; older entries are looked up live again
+MAX_AGE = float(os.getenv("RARITY_INDEX_MAX_AGE", str(6 * 60 * 60)))
+
+# Clubs refreshed per crawl run, oldest entries first; 0 refreshes every stale club
+CRAWL_LIMIT = int(os.getenv("RARITY_INDEX_CRAWL_LIMIT", "0"))
+
+# Fields fetched for every academy player while crawling
+CRAWL_FIELDS = "id rarity potential"
+
+# Clubs per crawl request, so one aliased query covers every slot of the batch
+CRAWL_BATCH = MAX_ALIASES_PER_QUERY // len(ACADEMY_SLOTS)
+
+# Column name -> array typecode, each indexed by numeric club id. Divisions are
+# dictionary-encoded with code 0 meaning "unknown"; refreshed_at 0 means never.
+COLUMNS = {
+    "rare_slots": "B",  # Bit n set when academy slot n holds a "Rare" player
+    "potential": "B",  # Best potential in the academy
+    "division": "H",
+    "refreshed_at": "q",
+}
+
+
+# League-wide academy rarity index for one generation: one array per column,
+# indexed by club id, so the listing scanner answers "does this club have a
+# rare academy player" with an array read instead of GraphQL calls. Kept in
+# the cache database as one blob per column and written by `crawl`.
+class RarityIndex:
+    def __init__(self, generation=ACADEMY_GENERATION, connection=None):
+        self.generation = generation
+        self.connection = connection or state_db.connect_cache()
+        self.lock = threading.Lock()
+        self.columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        self.divisions = [None]
+        with state_db.lock, self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS academy_index (
+                    generation INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    byteorder TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    PRIMARY KEY (generation, name)
+                )
+                """
+            )
+            rows = self.connection.execute(
+                "SELECT name, byteorder, data FROM academy_index WHERE generation = ?", (generation,)
+            ).fetchall()
+        for name, byteorder, data in rows:
+            if name == "divisions":
+                self.divisions = [None] + json.loads(data)
+            elif name in COLUMNS:
+                column = array(COLUMNS[name])
+                column.frombytes(data)
+                if byteorder != sys.byteorder:
+                    column.byteswap()
+                self.columns[name] = column
+
+    def __len__(self):
+        return sum(1 for refreshed_at in self.columns["refreshed_at"] if refreshed_at)
+
+    # Return the array position of a club, or None for ids that are not numeric
+    @staticmethod
+    def _position(club_id):
+        try:
+            position = int(club_id)
+        except (TypeError, ValueError):
+            return None
+        return position if position >= 0 else None
+
+    # Return (rare slots, best potential, division, refreshed_at) for a club,
+    # or None when it was never indexed
+    def lookup(self, club_id):
+        position = self._position(club_id)
+        columns = self.columns
+        if position is None or position >= len(columns["refreshed_at"]) or not columns["refreshed_at"][position]:
+            return None
+        return (
+            [n for n in ACADEMY_SLOTS if columns["rare_slots"][position] >> n & 1],
+            columns["potential"][position],
+            self.divisions[columns["division"][position]],
+            columns["refreshed_at"][position],
+        )
+
+    # Check whether a club has an unminted "Rare" academy player: True/False from
+    # a fresh entry, None when the club has to be looked up live
+    def has_unminted_rare_player(self, club_id, max_age=MAX_AGE, now=None):
+        position = self._position(club_id)
+        columns = self.columns
+        if position is None or position >= len(columns["refreshed_at"]):
+            return None
+        if columns["refreshed_at"][position] < (now or time.time()) - max_age:
+            return None
+        return columns["rare_slots"][position] != 0
+
+    # Return the clubs from `club_ids` whose entry is missing or older than
+    # `max_age`, oldest first
+    def stale(self, club_ids, max_age=MAX_AGE, now=None):
+        cutoff = (now or time.time()) - max_age
+        refreshed = self.columns["refreshed_at"]
+        ages = {}
+        for club_id in club_ids:
+            position = self._position(club_id)
+            if position is None:
+                continue
+            refreshed_at = refreshed[position] if position < len(refreshed) else 0
+            if refreshed_at < cutoff:
+                ages[club_id] = refreshed_at
+        return sorted(ages, key=ages.get)
+
+    # Store a club's academy (players in ACADEMY_SLOTS order) and division
+    def update(self, club_id, players, division, refreshed_at=None):
+        rare_slots = 0
+        for n, player in zip(ACADEMY_SLOTS, players):
+            if is_rare(player):
+                rare_slots |= 1 << n
+        potential = max([int((player or {}).get("potential") or 0) for player in players] + [0])
+        self.set_entry(club_id, rare_slots, min(255, potential), division, int(refreshed_at or time.time()))
+
+    # Return a club's raw (rare slot bits, best potential, division, refreshed_at),
+    # zero/None throughout when it is not in the index
+    def entry(self, club_id):
+        position = self._position(club_id)
+        if position is None or position >= len(self.columns["refreshed_at"]):
+            return 0, 0, None, 0
+        return (
+            self.columns["rare_slots"][position],
+            self.columns["potential"][position],
+            self.divisions[self.columns["division"][position]],
+            self.columns["refreshed_at"][position],
+        )
+
+    # Overwrite a club's raw entry, as returned by `entry`
+    def set_entry(self, club_id, rare_slots, potential, division, refreshed_at):
+        position = self._position(club_id)
+        if position is None:
+            return
+        with self.lock:
+            if division is not None and division not in self.divisions:
+                self.divisions.append(division)
+            for column in self.columns.values():
+                if position >= len(column):
+                    column.extend([0] * (position + 1 - len(column)))
+            self.columns["rare_slots"][position] = rare_slots
+            self.columns["potential"][position] = potential
+            self.columns["division"][position] = 0 if division is None else self.divisions.index(division)
+            self.columns["refreshed_at"][position] = refreshed_at
+
+    # Mark a club as not indexed, e.g. after its academy was regenerated
+    def forget(self, club_id):
+        position = self._position(club_id)
+        with self.lock:
+            if position is not None and position < len(self.columns["refreshed_at"]):
+                self.columns["refreshed_at"][position] = 0
+
+    # Write every column back to the cache database
+    def save(self):
+        with self.lock:
+            rows = [
+                (self.generation, name, sys.byteorder, column.tobytes()) for name, column in self.columns.items()
+            ]
+            rows.append((self.generation, "divisions", sys.byteorder, json.dumps(self.divisions[1:]).encode()))
+        with state_db.lock, self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO academy_index VALUES (?, ?, ?, ?)", rows)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+# Function to get the shared index of a generation, loading it on first use
+def get_index(generation=ACADEMY_GENERATION):
+    with _indexes_lock:
+        if generation not in _indexes:
+            _indexes[generation] = RarityIndex(generation)
+        return _indexes[generation]
+
+
+# Function to fetch and index one batch of clubs. Everything is fetched live,
+# since the metadata cache keeps fields far longer than MAX_AGE, and written
+# back to the cache. A club is only indexed when every academy slot and its
+# division came back in an error-free reply; the others are left for the next
+# crawl rather than indexed as not rare. Returns the number of clubs indexed.
+def crawl_batch(index, club_ids):
+    ids_by_club = {
+        club_id: [academy_player_id(club_id, n, index.generation) for n in ACADEMY_SLOTS] for club_id in club_ids
+    }
+    # Players from a failed or errored request are left out of the metadata
+    metadata = get_players_metadata([pid for ids in ids_by_club.values() for pid in ids], CRAWL_FIELDS, live=True)
+    complete = [club_id for club_id, ids in ids_by_club.items() if all(pid in metadata for pid in ids)]
+    divisions = lookup_club_divisions(complete, live=True) if complete else {}
+    complete = [club_id for club_id in complete if club_id in divisions]
+    for club_id in complete:
+        division = divisions[club_id]
+        index.update(
+            club_id,
+            [metadata[pid] for pid in ids_by_club[club_id]],
+            None if division == "Unknown Division" else division,
+        )
+    return len(complete)
+
+
+# Function to refresh the index entries of `club_ids` that are missing or older
+# than `max_age`, oldest first and at most `limit` clubs (0 for no limit), in
+# batches fanned out over the limiter. Returns the number of clubs indexed.
+def crawl(club_ids, generation=ACADEMY_GENERATION, max_age=MAX_AGE, limit=CRAWL_LIMIT, batch_size=CRAWL_BATCH):
+    index = get_index(generation)
+    club_ids = shard.select(club_ids)
+    stale = index.stale(club_ids, max_age)
+    if limit:
+        stale = stale[:limit]
+    print(f"Refreshing {len(stale)} of {len(club_ids)} clubs in the generation {generation} rarity index.")
+
+    async def run(limiter):
+        async def refresh(batch):
+            try:
+                return await limiter.run(GRAPHQL_ENDPOINT, crawl_batch, index, batch)
+            except requests.exceptions.RequestException as e:
+                print(f"Request error for a batch of {len(batch)} clubs: {e}")
+                return 0
+
+        batches = [stale[i:i + batch_size] for i in range(0, len(stale), batch_size)]
+        return sum(await asyncio.gather(*(refresh(batch) for batch in batches)))
+
+    try:
+        with metrics.span("index_crawl"):
+            indexed = run_scan(run, HostLimiter())
+    finally:
+        index.save()
+    metrics.count("index_clubs_refreshed_total", indexed)
+    print(f"Indexed {indexed} clubs; {len(index)} clubs in the index.")
+    return indexed
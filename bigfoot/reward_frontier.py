@@ -0,0 +1,149 @@
+import os
+import time
+
+from bigfoot import state_db
+
+# Seconds before a far gallop probe that found no REWARD id is probed again,
+# doubled per miss up to PROBE_BACKOFF_MAX. The id right after a club's
+# frontier is probed on every run regardless.
+PROBE_BACKOFF = float(os.getenv("REWARD_PROBE_BACKOFF", "300"))
+PROBE_BACKOFF_MAX = float(os.getenv("REWARD_PROBE_BACKOFF_MAX", str(6 * 60 * 60)))
+
+
+# Function to build the id of a club's REWARD player
+def reward_player_id(generation, club_id, number):
+    return f"{generation}-{club_id}-{number}-REWARD"
+
+
+# Highest existing REWARD number per (generation, club), plus the backoff
+# schedule of far gallop probes that did not exist yet
+class FrontierStore:
+    def __init__(self, connection=None):
+        self.connection = connection or state_db.connect()
+        self.lock = state_db.lock
+        with self.lock, self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS reward_frontiers (
+                    generation INTEGER NOT NULL,
+                    club_id TEXT NOT NULL,
+                    frontier INTEGER NOT NULL,
+                    PRIMARY KEY (generation, club_id)
+                )
+                """
+            )
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS reward_probe_backoff (
+                    generation INTEGER NOT NULL,
+                    club_id TEXT NOT NULL,
+                    number INTEGER NOT NULL,
+                    misses INTEGER NOT NULL,
+                    next_probe_at REAL NOT NULL,
+                    PRIMARY KEY (generation, club_id, number)
+                )
+                """
+            )
+
+    # Return {club_id: frontier}, with `default` for clubs never probed
+    def frontiers(self, generation, club_ids, default):
+        with self.lock:
+            stored = dict(self.connection.execute(
+                "SELECT club_id, frontier FROM reward_frontiers WHERE generation = ?", (generation,)
+            ))
+        return {club_id: stored.get(club_id, default) for club_id in club_ids}
+
+    # Check whether an id's backoff has run out
+    def due(self, generation, club_id, number, now=None):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT next_probe_at FROM reward_probe_backoff WHERE generation = ? AND club_id = ? AND number = ?",
+                (generation, club_id, number),
+            ).fetchone()
+        return row is None or row[0] <= (now or time.time())
+
+    # Push an id that did not exist further back in the probe schedule
+    def record_miss(self, generation, club_id, number):
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT misses FROM reward_probe_backoff WHERE generation = ? AND club_id = ? AND number = ?",
+                (generation, club_id, number),
+            ).fetchone()
+            misses = (row[0] if row else 0) + 1
+            delay = min(PROBE_BACKOFF_MAX, PROBE_BACKOFF * 2 ** (misses - 1))
+            self.connection.execute(
+                "INSERT OR REPLACE INTO reward_probe_backoff VALUES (?, ?, ?, ?, ?)",
+                (generation, club_id, number, misses, time.time() + delay),
+            )
+
+    # Move a club's frontier forward and forget the backoff of ids now behind it
+    def advance(self, generation, club_id, frontier):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO reward_frontiers VALUES (?, ?, ?)", (generation, club_id, frontier)
+            )
+            self.connection.execute(
+                "DELETE FROM reward_probe_backoff WHERE generation = ? AND club_id = ? AND number <= ?",
+                (generation, club_id, frontier),
+            )
+
+
+# Function to check whether a club's search still has ids left between its
+# highest existing and lowest missing number
+def searching(search):
+    low, high, _, _ = search
+    return high is None or high - low > 1
+
+
+# Function to push every club's frontier as far as existing REWARD ids go.
+# Each round probes one id per club in a single `await lookup(player_ids)` call,
+# which returns {player_id: metadata or None} and leaves out failed ids. Clubs
+# gallop past their frontier (+1, +3, +7, ...) until an id is missing, then
+# binary search back to the last existing id, so finding k new ids takes about
+# 2*log2(k) rounds. The id right after the frontier is always probed; a far
+# gallop probe that is still backing off is taken as missing without a lookup.
+# Returns {club_id: (old frontier, new frontier, metadata of the newest id)} for
+# clubs with new ids.
+async def advance_frontiers(club_ids, generation, first_number, lookup, store):
+    frontiers = store.frontiers(generation, club_ids, first_number - 1)
+    now = time.time()
+    # club_id -> [highest existing number, lowest missing number or None, gallop step, newest metadata]
+    searches = {club_id: [frontier, None, 1, None] for club_id, frontier in frontiers.items()}
+
+    failed = set()
+    active = list(searches)
+    while active:
+        probes = {}
+        for club_id in active:
+            search = searches[club_id]
+            low, high, step, _ = search
+            number = low + step if high is None else (low + high) // 2
+            if high is None and number > frontiers[club_id] + 1 and not store.due(generation, club_id, number, now):
+                search[1] = number
+                if not searching(search):
+                    continue
+                number = (low + number) // 2
+            probes[reward_player_id(generation, club_id, number)] = (club_id, number)
+        results = await lookup(list(probes)) if probes else {}
+
+        for player_id, (club_id, number) in probes.items():
+            search = searches[club_id]
+            if player_id not in results:
+                failed.add(club_id)
+            elif results[player_id]:
+                search[0] = number
+                search[3] = results[player_id]
+                if search[1] is None:
+                    search[2] *= 2
+            else:
+                if search[1] is None and number > frontiers[club_id] + 1:
+                    store.record_miss(generation, club_id, number)
+                search[1] = number
+        active = [club_id for club_id in active if club_id not in failed and searching(searches[club_id])]
+
+    advanced = {}
+    for club_id, (low, _, _, newest) in searches.items():
+        if club_id not in failed and low > frontiers[club_id]:
+            store.advance(generation, club_id, low)
+            advanced[club_id] = (frontiers[club_id], low, newest)
+    return advanced
@@ -0,0 +1,215 @@
+import asyncio
+import os
+import signal
+import sys
+
+import requests
+
+from bigfoot import metrics, notify_queue, shard, state_db
+from bigfoot.footium_api import GRAPHQL_ENDPOINT, get_players_metadata
+from bigfoot.scanner import HostLimiter, run_scan
+
+# Player ids per parallel GraphQL lookup
+PLAYERS_PER_QUERY = int(os.getenv("FOOTIUM_PLAYERS_PER_QUERY", "175"))
+
+# Name of the unified runner's watermark in the state database
+WATERMARK_NAME = "runner-listings"
+
+# Alert title used by the generation 5 detector (SmallFoot5.py)
+GEN5_TITLE = "GENERATION NUM 5 New club with academy rare listed:"
+
+
+# Player records fetched during one run and shared by every detector. Each
+# player id is fetched at most once per GraphQL selection; ids whose lookup
+# failed are kept in `failed` and fetched again when asked for.
+class PlayerSnapshot:
+    def __init__(self):
+        self.players = {}
+        self.failed = set()
+        self._fetched = {}
+
+    # Fetch whatever part of {player_id: set of selections} is not in the snapshot yet
+    async def fetch(self, wanted, limiter):
+        groups = {}
+        for player_id, selections in wanted.items():
+            missing = selections - self._fetched.get(player_id, set())
+            if missing:
+                groups.setdefault(frozenset(missing), []).append(player_id)
+
+        lookups = []
+        for selections, player_ids in groups.items():
+            fields = " ".join(sorted(selections))
+            for start in range(0, len(player_ids), PLAYERS_PER_QUERY):
+                chunk = player_ids[start:start + PLAYERS_PER_QUERY]
+                lookups.append((selections, chunk, self._lookup(chunk, fields, limiter)))
+
+        results = await asyncio.gather(*(lookup for _, _, lookup in lookups))
+        for (selections, chunk, _), metadata in zip(lookups, results):
+            for player_id, player in metadata.items():
+                previous = self.players.get(player_id)
+                self.players[player_id] = dict(previous or {}, **player) if player else previous
+                self._fetched.setdefault(player_id, set()).update(selections)
+            # Ids missing from the result were in a request that failed
+            self.failed.difference_update(metadata)
+            self.failed.update(player_id for player_id in chunk if player_id not in metadata)
+
+    async def _lookup(self, player_ids, fields, limiter):
+        try:
+            return await limiter.run(GRAPHQL_ENDPOINT, get_players_metadata, player_ids, fields)
+        except requests.exceptions.RequestException as e:
+            print(f"Request error for {len(player_ids)} players: {e}")
+            return {}
+
+
+# Function to merge the player ids several detectors need into {player_id: set of selections}
+def wanted_players(detectors, player_ids_of):
+    wanted = {}
+    for detector in detectors:
+        for player_id in player_ids_of(detector):
+            wanted.setdefault(player_id, set()).add(detector.fields)
+    return wanted
+
+
+# Function to stream a detector's sweep hits into its on_hit hook
+async def run_sweep(detector, limiter):
+    from bigfoot.sweep import sweep_ids
+
+    sweep = detector.sweep
+    hits = sweep_ids(
+        shard.select(sweep.ids()), detector.check_batch, limiter, GRAPHQL_ENDPOINT, sweep.batch_size, sweep.stop_on_first_hit
+    )
+    with metrics.span(f"sweep_{detector.name}"):
+        async for item, result in hits:
+            metrics.count("sweep_hits_total", sweep=detector.name)
+            await detector.on_hit(item, result, limiter)
+
+
+# Function to fetch and evaluate every detector's watched player ids, while
+# the sweeping detectors run alongside
+async def check_watched(detectors, snapshot, limiter):
+    async def evaluate():
+        wanted = wanted_players(detectors, lambda detector: detector.watched_player_ids())
+        if wanted:
+            with metrics.span("fetch_players"):
+                await snapshot.fetch(wanted, limiter)
+        with metrics.span("evaluate_watched"):
+            await asyncio.gather(*(detector.evaluate_watched(snapshot.players, limiter) for detector in detectors))
+
+    sweeps = [run_sweep(detector, limiter) for detector in detectors if detector.sweep]
+    await asyncio.gather(evaluate(), *sweeps)
+
+
+# Function to fetch the players a page of listing rows needs and evaluate every
+# detector on it. Rows with a failed player lookup are left out and returned,
+# to be checked again later instead of being taken for clubs without rares.
+# Detectors that only record listings get their players once the alerting ones
+# are done, so they never hold back an alert.
+async def check_listings(detectors, rows, snapshot, limiter):
+    # Every shard walks the same pages; each only checks the listings it owns
+    rows = [row for row in rows if shard.owns(row.identifier)]
+    if not rows:
+        return []
+    alerting = [detector for detector in detectors if detector.alerts]
+    recording = [detector for detector in detectors if not detector.alerts]
+    with metrics.span("fetch_players"):
+        await snapshot.fetch(wanted_players(alerting, lambda detector: detector.listing_player_ids(rows)), limiter)
+    deferred = []
+    if snapshot.failed:
+        checked = []
+        for row in rows:
+            failed = any(snapshot.failed.intersection(detector.listing_player_ids([row])) for detector in alerting)
+            (deferred if failed else checked).append(row)
+        rows = checked
+        metrics.count("listings_deferred_total", len(deferred))
+        if not rows:
+            return deferred
+    metrics.count("listings_checked_total", len(rows))
+    with metrics.span("evaluate_listings"):
+        await asyncio.gather(*(detector.evaluate_listings(rows, snapshot.players, limiter) for detector in alerting))
+    if recording:
+        # Players whose lookup failed are recorded as unknown
+        with metrics.span("fetch_players"):
+            await snapshot.fetch(wanted_players(recording, lambda detector: detector.listing_player_ids(rows)), limiter)
+        with metrics.span("record_listings"):
+            await asyncio.gather(*(detector.evaluate_listings(rows, snapshot.players, limiter) for detector in recording))
+    return deferred
+
+
+# Function to run detectors against one shared fetch pass: watched ids first,
+# then every new listing page (when `watermark_name` is given). Queued Discord
+# alerts get a chance to go out, then the state is persisted once for the run
+# and the run's metrics are reported. Runs under cProfile with --profile.
+# `full_scan` defaults to listing_scan.FULL_SCAN.
+def run(detectors, watermark_name=WATERMARK_NAME, full_scan=None):
+    # A cancelled or timed-out job is stopped with SIGTERM; handle it like
+    # Ctrl-C so the state, with the listing walk's checkpoint, is still persisted
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        metrics.profiled(_run, detectors, watermark_name, full_scan)
+    finally:
+        metrics.report()
+
+
+def _run(detectors, watermark_name, full_scan):
+    snapshot = PlayerSnapshot()
+    shard.record_shard()
+    try:
+        with metrics.span("watched"):
+            run_scan(lambda limiter: check_watched(detectors, snapshot, limiter), HostLimiter())
+        if watermark_name:
+            from bigfoot.listing_scan import FULL_SCAN, scan_new_listings
+
+            with metrics.span("listings"):
+                scan_new_listings(
+                    watermark_name,
+                    lambda rows, limiter: check_listings(detectors, rows, snapshot, limiter),
+                    FULL_SCAN if full_scan is None else full_scan,
+                )
+        with metrics.span("notify_flush"):
+            notify_queue.flush()
+    finally:
+        state_db.persist()
+
+
+# Function to build every detector from the environment the individual scripts use
+def default_detectors():
+    from bigfoot.detectors import (
+        AcademyRareDetector,
+        ClubWatchlistDetector,
+        HistoryRecorder,
+        RegenRefreshDetector,
+        RewardPlayerDetector,
+    )
+    from bigfoot.sweep import load_reward_probes, load_sweep
+
+    webhook_url = os.getenv("DISCORD_WEBHOOK_URL")
+    webhook_url2 = os.getenv("DISCORD_WEBHOOK_URL2")
+    return [
+        AcademyRareDetector("academy", webhook_url, scope=""),
+        AcademyRareDetector("gen5", webhook_url, title=GEN5_TITLE),
+        ClubWatchlistDetector(load_sweep("watchlist"), webhook_url2),
+        RegenRefreshDetector(webhook_url, load_sweep("regen")),
+        RewardPlayerDetector(webhook_url2, **load_reward_probes()),
+        HistoryRecorder(),
+    ]
+
+
+# Run every detector, or only those named on the command line (options such
+# as --profile are read by the modules that use them)
+def main(argv=None):
+    from bigfoot.opensea_api import API_KEY
+
+    names = [arg for arg in (sys.argv[1:] if argv is None else argv) if not arg.startswith("--")]
+    detectors = [detector for detector in default_detectors() if not names or detector.name in names]
+    if not detectors:
+        print(f"Unknown detectors: {', '.join(names)}")
+        exit(1)
+    uses_listings = any(detector.uses_listings for detector in detectors)
+    if uses_listings and not API_KEY:
+        print("Error: Missing OPENSEA_API_KEY. Exiting script.")
+        exit(1)
+    run(detectors, WATERMARK_NAME if uses_listings else None)
+
+
+if __name__ == "__main__":
+    main()
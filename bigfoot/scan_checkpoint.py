@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import time
+from array import array
+
+from bigfoot import metrics, shard, state_db
+from bigfoot.opensea_api import Listing
+
+# Seconds an interrupted walk stays resumable; older progress is dropped and
+# the walk starts over, since the cursors and listings behind it have moved on.
+# Pending listings are kept whatever their age, until checked or expired.
+MAX_AGE = float(os.getenv("SCAN_CHECKPOINT_MAX_AGE", str(6 * 60 * 60)))
+
+# Seconds between snapshots of the state database written mid-walk, so a job
+# killed on timeout still leaves its progress behind; 0 disables them
+SNAPSHOT_INTERVAL = float(os.getenv("SCAN_CHECKPOINT_SNAPSHOT_INTERVAL", "60"))
+
+
+# Function to reduce a listing to the 64-bit key stored in `processed`
+def listing_key(listing):
+    identity = f"{listing.token}/{listing.identifier}/{listing.order_hash}".encode()
+    return int.from_bytes(hashlib.blake2b(identity, digest_size=8).digest(), "big", signed=True)
+
+
+# Progress of one listing walk, stored in the state database after every page:
+# the cursor of the next page, the keys of the listings already handled and
+# the listings still pending, i.e. queued for evaluation or whose player
+# lookups failed. A run that failed or was killed part way resumes from the
+# cursor without handling any listing twice, and the listings left pending
+# are checked by the next run, even after the walk itself completed. Each
+# shard keeps its own checkpoint.
+class ScanCheckpoint:
+    def __init__(self, name, connection=None, max_age=MAX_AGE):
+        self.name = name if shard.COUNT == 1 else f"{name}@{shard.SHARD}"
+        self.connection = connection or state_db.connect()
+        self.lock = state_db.lock
+        self.last_snapshot = time.monotonic()
+        with self.lock, self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scan_checkpoints (
+                    name TEXT PRIMARY KEY,
+                    kind TEXT,
+                    since INTEGER,
+                    cursor TEXT,
+                    started_at INTEGER,
+                    newest INTEGER,
+                    processed BLOB NOT NULL,
+                    pending TEXT NOT NULL,
+                    updated_at INTEGER NOT NULL
+                )
+                """
+            )
+            row = self.connection.execute(
+                "SELECT kind, since, cursor, started_at, newest, processed, pending, updated_at "
+                "FROM scan_checkpoints WHERE name = ?",
+                (self.name,),
+            ).fetchone()
+
+        self.reset()
+        self.pending = {}
+        if row is None:
+            return
+        kind, since, cursor, started_at, newest, processed, pending, updated_at = row
+        self.pending = {entry[0]: entry[1:] for entry in json.loads(pending)}
+        if kind and updated_at >= time.time() - max_age:
+            self.kind, self.since, self.cursor = kind, since, cursor
+            self.started_at, self.newest = started_at, newest
+            self.processed = set(array("q", processed))
+
+    # Forget the walk's progress; pending listings are kept
+    def reset(self):
+        self.kind = None
+        self.since = None
+        self.cursor = None
+        self.started_at = None
+        self.newest = None
+        self.processed = set()
+
+    # Start a walk of `kind` ("pages" or "events") from `since`, resuming the
+    # stored one when it is the same walk. Returns True when resuming.
+    def begin(self, kind, since=None, started_at=None):
+        if (self.kind, self.since) == (kind, since):
+            return True
+        self.reset()
+        self.kind, self.since = kind, since
+        self.started_at = int(started_at or time.time())
+        return False
+
+    # Start the walk over from its first page, e.g. when the stored cursor no
+    # longer works; listings already handled are still skipped
+    def restart(self):
+        self.cursor = None
+
+    # Return the listings of a page that were not handled yet
+    def unprocessed(self, listings):
+        if not self.processed:
+            return listings
+        return [listing for listing in listings if listing_key(listing) not in self.processed]
+
+    # Record that every listing of a page was handled and where the walk goes next
+    def page_done(self, listings, next_cursor, newest=None):
+        self.processed.update(listing_key(listing) for listing in listings)
+        self.cursor = next_cursor
+        if newest is not None:
+            self.newest = newest
+        self.save()
+        if SNAPSHOT_INTERVAL and time.monotonic() - self.last_snapshot >= SNAPSHOT_INTERVAL:
+            state_db.save_snapshot()
+            self.last_snapshot = time.monotonic()
+
+    # Record the walk as complete; only its pending listings are kept
+    def finish(self):
+        self.reset()
+        self.save()
+
+    # Keep listings pending until they are checked (saved with the next page);
+    # listings pending already keep the time they were first deferred
+    def defer(self, listings):
+        now = int(time.time())
+        for listing in listings:
+            self.pending.setdefault(listing_key(listing), [
+                listing.identifier, listing.token, listing.price, listing.order_hash, listing.expires_at, now,
+            ])
+
+    # Drop listings from the pending ones once they were checked
+    def resolve(self, listings):
+        for listing in listings:
+            self.pending.pop(listing_key(listing), None)
+
+    # Return the pending listings, dropping those that have expired since. They
+    # stay pending until resolved, so a crash while checking them loses nothing.
+    def pending_listings(self, now=None):
+        now = now or time.time()
+        expired = [key for key, entry in self.pending.items() if entry[4] and entry[4] < now]
+        for key in expired:
+            del self.pending[key]
+        if expired:
+            print(f"Dropped {len(expired)} pending listings that expired before they were checked.")
+            metrics.count("pending_listings_expired_total", len(expired))
+        return [
+            Listing(identifier, token, price, order_hash, expires_at)
+            for identifier, token, price, order_hash, expires_at, _ in self.pending.values()
+        ]
+
+    # Write the checkpoint to the state database
+    def save(self):
+        processed = array("q", sorted(self.processed)).tobytes()
+        pending = json.dumps([[key] + entry for key, entry in self.pending.items()])
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO scan_checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.name, self.kind, self.since, self.cursor, self.started_at, self.newest,
+                 processed, pending, int(time.time())),
+            )
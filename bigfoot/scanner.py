@@ -0,0 +1,136 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from bigfoot.opensea_api import EVENTS_URL, LISTINGS_URL, get_listing_events_page, get_listings_page
+
+# Max concurrent requests per host, overridable from the environment
+HOST_CONCURRENCY = {
+    "api.opensea.io": int(os.getenv("OPENSEA_CONCURRENCY", "2")),
+    "live.api.footium.club": int(os.getenv("FOOTIUM_CONCURRENCY", "8")),
+    "discord.com": int(os.getenv("DISCORD_CONCURRENCY", "2")),
+    "discordapp.com": int(os.getenv("DISCORD_CONCURRENCY", "2")),
+}
+
+# Limit for any host not listed above
+DEFAULT_CONCURRENCY = int(os.getenv("DEFAULT_CONCURRENCY", "4"))
+
+
+# Bounds how many blocking calls run at once against each host
+class HostLimiter:
+    def __init__(self, limits=None, default=DEFAULT_CONCURRENCY):
+        self.limits = dict(HOST_CONCURRENCY if limits is None else limits)
+        self.default = default
+        self._semaphores = {}
+
+    def max_workers(self):
+        return sum(self.limits.values()) + self.default
+
+    def _semaphore(self, url):
+        host = urlparse(url or "").hostname or ""
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.limits.get(host, self.default))
+        return self._semaphores[host]
+
+    # Run a blocking call for `url` in a worker thread once the host has a free slot
+    async def run(self, url, func, *args, **kwargs):
+        async with self._semaphore(url):
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+
+# Function to report the malformed entries a page skipped
+def report_malformed(page):
+    if page.malformed:
+        print(f"Skipped {page.malformed} malformed listings on this page.\n")
+
+
+# Function to walk the listing cursor chain, prefetching the next page while
+# `process_page(rows)` runs for the current one. With a checkpoint the walk
+# starts at its stored cursor, skips the listings it already handled and
+# records each page once processed. Returns False if a page failed.
+async def scan_listing_pages(process_page, limiter, checkpoint=None):
+    cursor = checkpoint.cursor if checkpoint else None
+    if cursor:
+        print(f"Resuming the listing walk at cursor {cursor}\n")
+    pending = asyncio.ensure_future(limiter.run(LISTINGS_URL, get_listings_page, cursor))
+    while pending is not None:
+        page = await pending
+        pending = None
+        if page is None:
+            return False
+        if not page.found:
+            print("No listings found in the collection.")
+            break
+
+        if page.next:
+            print(f"Next page cursor: {page.next}\n")
+            pending = asyncio.ensure_future(limiter.run(LISTINGS_URL, get_listings_page, page.next))
+        else:
+            print("No more listings to fetch.")
+
+        print(f"Found {len(page.listings) + page.malformed} active listings in the Footium Clubs collection:\n")
+        report_malformed(page)
+        if checkpoint:
+            await process_page(checkpoint.unprocessed(page.listings))
+            checkpoint.page_done(page.listings, page.next)
+        else:
+            await process_page(page.listings)
+    return True
+
+
+# Function to walk the listing event feed back to the `since` unix timestamp,
+# handing only listings created after it to `process_page(rows)`, resuming
+# from a checkpoint like scan_listing_pages. Returns the newest event
+# timestamp seen (at least `since`), or None if a page failed.
+async def scan_listing_events(process_page, limiter, since, checkpoint=None):
+    newest = max(since, checkpoint.newest or since) if checkpoint else since
+    cursor = checkpoint.cursor if checkpoint else None
+    if cursor:
+        print(f"Resuming the listing event walk at cursor {cursor}\n")
+    pending = asyncio.ensure_future(limiter.run(EVENTS_URL, get_listing_events_page, since, cursor))
+    while pending is not None:
+        page = await pending
+        pending = None
+        if page is None:
+            return None
+
+        now = time.time()
+        listings = []
+        reached_seen = False
+        for listing in page.listings:
+            if listing.listed_at is not None:
+                if listing.listed_at < since:
+                    reached_seen = True
+                    continue
+                newest = max(newest, listing.listed_at)
+            # Listings that have already expired can no longer be bought
+            if listing.expires_at and listing.expires_at < now:
+                continue
+            listings.append(listing)
+
+        next_cursor = page.next if not reached_seen else None
+        if next_cursor:
+            pending = asyncio.ensure_future(limiter.run(EVENTS_URL, get_listing_events_page, since, next_cursor))
+
+        if checkpoint:
+            listings = checkpoint.unprocessed(listings)
+        print(f"Found {len(listings)} new listings since the last run.\n")
+        report_malformed(page)
+        if listings:
+            await process_page(listings)
+        if checkpoint:
+            checkpoint.page_done(listings, next_cursor, newest)
+    return newest
+
+
+# Function to run a scan coroutine with a thread pool sized for the host limits
+def run_scan(scan, limiter):
+    async def main():
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=limiter.max_workers())
+        )
+        return await scan(limiter)
+
+    return asyncio.run(main())
@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+
+from bigfoot import metrics, state_db
+
+# This process's shard as "i/N" (0 <= i < N); unset runs the whole scan
+SHARD = os.getenv("SHARD", "")
+
+# Table recording which shard wrote a state snapshot, read by the merge step
+SHARD_TABLE = "shard_runs"
+
+# Per-table rule for two shards changing the same row: keep the row with the
+# larger value in this column. Other tables are partitioned, so shards never
+# change the same row and the last one merged wins.
+KEEP_LARGER = {
+    "metadata_cache": "expires_at",
+    "reward_frontiers": "frontier",
+    "sync_watermarks": "timestamp",
+}
+
+# Tables merged by their own rules below rather than row by row
+SPECIAL_TABLES = {SHARD_TABLE, "sync_watermarks", "academy_index"}
+
+
+# Function to parse "i/N" into (i, N); an empty value is the single shard 0/1
+def parse_shard(value):
+    if not value:
+        return 0, 1
+    index, _, count = value.partition("/")
+    index, count = int(index), int(count)
+    if not 0 <= index < count:
+        raise ValueError(f"Invalid shard {value!r}: expected i/N with 0 <= i < N")
+    return index, count
+
+
+INDEX, COUNT = parse_shard(SHARD)
+
+
+# Function to pick the shard that owns a key (token id, club id, sweep id, ...),
+# the same on every machine and every run
+def shard_of(key, count=COUNT):
+    if count == 1:
+        return 0
+    digest = hashlib.blake2b(str(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+# Function to check whether this process's shard owns a key
+def owns(key):
+    return shard_of(key) == INDEX
+
+
+# Function to keep the keys this process's shard owns, in order
+def select(keys):
+    return list(keys) if COUNT == 1 else [key for key in keys if owns(key)]
+
+
+# Function to record in the state database which shard this run is, so the
+# merge step can tell whether every shard reported back
+def record_shard(connection=None):
+    if COUNT == 1:
+        return
+    connection = connection or state_db.connect()
+    with state_db.lock, connection:
+        connection.execute(f"CREATE TABLE IF NOT EXISTS {SHARD_TABLE} (shard INTEGER PRIMARY KEY, count INTEGER)")
+        connection.execute(f"DELETE FROM {SHARD_TABLE}")
+        connection.execute(f"INSERT INTO {SHARD_TABLE} VALUES (?, ?)", (INDEX, COUNT))
+
+
+# Function to list a database's tables with their columns and primary key columns
+def _tables(connection, schema):
+    tables = {}
+    names = connection.execute(
+        f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    for name, in names:
+        info = connection.execute(f"PRAGMA {schema}.table_info({name})").fetchall()
+        columns = [row[1] for row in info]
+        primary_key = [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5]]
+        tables[name] = (columns, primary_key)
+    return tables
+
+
+# Function to apply one shard's changes since the base snapshot to `main`:
+# rows the shard deleted are deleted and rows it added or changed are upserted.
+# Tables without a primary key only ever grow, so their new rows are inserted.
+def _merge_table(connection, name, columns, primary_key, base_tables):
+    column_list = ", ".join(columns)
+    in_base = name in base_tables
+    if not primary_key:
+        connection.execute(f"INSERT OR IGNORE INTO main.{name} SELECT {column_list} FROM shard.{name}")
+        return
+
+    key_list = ", ".join(primary_key)
+    if in_base:
+        connection.execute(
+            f"DELETE FROM main.{name} WHERE ({key_list}) IN "
+            f"(SELECT {key_list} FROM base.{name} EXCEPT SELECT {key_list} FROM shard.{name})"
+        )
+        changed = f"SELECT {column_list} FROM shard.{name} EXCEPT SELECT {column_list} FROM base.{name}"
+    else:
+        changed = f"SELECT {column_list} FROM shard.{name}"
+
+    if name == "outbound_alerts":
+        # Alerts queued during the run got ids that other shards may have used too
+        base_ids = "SELECT id FROM base.outbound_alerts" if in_base else "SELECT NULL WHERE 0"
+        other = [column for column in columns if column != "id"]
+        connection.execute(
+            f"INSERT INTO main.{name} ({', '.join(other)}) SELECT {', '.join(other)} FROM ({changed}) "
+            f"WHERE id NOT IN ({base_ids})"
+        )
+        changed = f"SELECT * FROM ({changed}) WHERE id IN ({base_ids})"
+
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column not in primary_key)
+    larger = KEEP_LARGER.get(name)
+    condition = f" WHERE excluded.{larger} > {name}.{larger}" if larger else ""
+    action = f"DO UPDATE SET {updates}{condition}" if updates else "DO NOTHING"
+    connection.execute(
+        f"INSERT INTO main.{name} ({column_list}) SELECT * FROM ({changed}) WHERE true "
+        f"ON CONFLICT ({key_list}) {action}"
+    )
+
+
+# Function to merge the rarity index into the database at `output_path`: a
+# club entry one shard changed since the base wins, and the most recently
+# refreshed one wins when several shards changed it
+def _merge_rarity_index(output_path, base_path, shard_paths):
+    from bigfoot.rarity_index import RarityIndex
+
+    def indexes(path):
+        connection = sqlite3.connect(path)
+        if not _has_table(connection, "academy_index"):
+            return connection, {}
+        generations = [row[0] for row in connection.execute("SELECT DISTINCT generation FROM academy_index")]
+        return connection, {generation: RarityIndex(generation, connection) for generation in generations}
+
+    connections = []
+    try:
+        base_connection, base = indexes(base_path)
+        output = sqlite3.connect(output_path)
+        connections += [base_connection, output]
+        merged = {}
+        changed = {}
+        for path in shard_paths:
+            connection, shard_indexes = indexes(path)
+            connections.append(connection)
+            for generation, index in shard_indexes.items():
+                before = base.get(generation)
+                target = merged.setdefault(generation, RarityIndex(generation, output))
+                for club_id in range(len(index.columns["refreshed_at"])):
+                    entry = index.entry(club_id)
+                    if entry == (before.entry(club_id) if before else (0, 0, None, 0)):
+                        continue
+                    previous = changed.get((generation, club_id))
+                    if previous is None or entry[3] >= previous[3]:
+                        changed[(generation, club_id)] = entry
+                        target.set_entry(club_id, *entry)
+        for index in merged.values():
+            index.save()
+        output.commit()
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+# Function to check whether a database has a table
+def _has_table(connection, name, schema="main"):
+    return connection.execute(
+        f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+
+# Function to merge the state snapshots of sharded runs into `state_path`. Each
+# shard's changes are applied as a diff against `base_path`, the snapshot every
+# shard started from (by default `state_path` itself), so deletions (delivered
+# alerts, invalidated cache rows) carry over too. Watermarks of a sharded run
+# only move, to the slowest shard's, once every shard reported back; those of a
+# snapshot without a shard record, a whole run, are merged like any other row.
+def merge_states(shard_paths, state_path=state_db.STATE_DB, base_path=None):
+    temp_path = state_path + ".merge"
+    own_base = base_path is None
+    if own_base:
+        base_path = state_path + ".base"
+    if os.path.exists(state_path):
+        shutil.copyfile(state_path, temp_path)
+        if own_base:
+            shutil.copyfile(state_path, base_path)
+    else:
+        sqlite3.connect(temp_path).close()
+    if not os.path.exists(base_path):
+        sqlite3.connect(base_path).close()
+
+    connection = sqlite3.connect(temp_path)
+    try:
+        connection.execute("ATTACH DATABASE ? AS base", (base_path,))
+        base_tables = _tables(connection, "base")
+        shards = {}
+        watermarks = []
+        for path in shard_paths:
+            connection.execute("ATTACH DATABASE ? AS shard", (path,))
+            sharded = _has_table(connection, SHARD_TABLE, "shard")
+            if sharded:
+                for index, count in connection.execute(f"SELECT shard, count FROM shard.{SHARD_TABLE}"):
+                    shards[index] = count
+            special = SPECIAL_TABLES if sharded else SPECIAL_TABLES - {"sync_watermarks"}
+            for name, (columns, primary_key) in _tables(connection, "shard").items():
+                if name in special:
+                    continue
+                if not _has_table(connection, name):
+                    sql, = connection.execute(
+                        "SELECT sql FROM shard.sqlite_master WHERE type = 'table' AND name = ?", (name,)
+                    ).fetchone()
+                    connection.execute(sql)
+                _merge_table(connection, name, columns, primary_key, base_tables)
+            if sharded and _has_table(connection, "sync_watermarks", "shard"):
+                watermarks.append(connection.execute("SELECT * FROM shard.sync_watermarks").fetchall())
+            elif sharded:
+                watermarks.append([])
+            connection.commit()
+            connection.execute("DETACH DATABASE shard")
+
+        counts = set(shards.values())
+        complete = len(counts) == 1 and set(shards) == set(range(counts.pop()))
+        if complete and watermarks:
+            latest = {}
+            for rows in watermarks:
+                for name, timestamp, updated_at in rows:
+                    latest.setdefault(name, []).append((timestamp, updated_at))
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS sync_watermarks "
+                "(name TEXT PRIMARY KEY, timestamp INTEGER NOT NULL, updated_at INTEGER NOT NULL)"
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO sync_watermarks VALUES (?, ?, ?)",
+                [(name, *min(values)) for name, values in latest.items() if len(values) == len(watermarks)],
+            )
+        elif any(watermarks):
+            print(f"Only shards {sorted(shards)} reported back, keeping the previous watermarks.")
+        connection.commit()
+    finally:
+        connection.close()
+
+    with metrics.span("merge_rarity_index"):
+        _merge_rarity_index(temp_path, base_path, shard_paths)
+    if own_base:
+        os.remove(base_path)
+    os.replace(temp_path, state_path)
+    print(f"Merged {len(shard_paths)} shard snapshots into {state_path}.")
+
+
+# Function to copy the history segments the shards wrote into `history_dir`
+def merge_history(shard_history_dirs, history_dir):
+    copied = 0
+    for directory in shard_history_dirs:
+        for root, _, filenames in os.walk(directory):
+            target = os.path.join(history_dir, os.path.relpath(root, directory))
+            for filename in filenames:
+                if filename.endswith(".seg") and not os.path.exists(os.path.join(target, filename)):
+                    os.makedirs(target, exist_ok=True)
+                    shutil.copyfile(os.path.join(root, filename), os.path.join(target, filename))
+                    copied += 1
+    print(f"Copied {copied} history segments into {history_dir}.")
+
+
+# Function to merge the outputs of sharded runs, one directory per shard
+# holding its state snapshot and optionally its cache database, `history/`
+# and `metrics.json`. `base_path` is the state snapshot the shards started
+# from, when the checkout has moved on since. The per-shard metrics are added
+# to this process's, so the merged totals come out of the usual metrics report.
+def merge(shard_dirs, state_path=state_db.STATE_DB, history_dir=None, metrics_name="metrics.json",
+          cache_path=state_db.CACHE_DB, base_path=None):
+    from bigfoot.history_store import HISTORY_DIR
+
+    with metrics.span("merge_states"):
+        for path, base in ((state_path, base_path), (cache_path, None)):
+            name = os.path.basename(path)
+            shard_paths = [os.path.join(d, name) for d in shard_dirs if os.path.exists(os.path.join(d, name))]
+            merge_states(shard_paths, path, base)
+    merge_history([os.path.join(d, "history") for d in shard_dirs], history_dir or HISTORY_DIR)
+    for directory in shard_dirs:
+        path = os.path.join(directory, metrics_name)
+        if os.path.exists(path):
+            with open(path) as file:
+                metrics.absorb(json.load(file))
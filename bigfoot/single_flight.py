@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import Future
+
+from bigfoot import metrics
+
+_flights = []
+
+
+# In-run memo of keyed lookups with single-flight semantics: the first caller
+# of a key fetches it, callers asking for the same key meanwhile wait for that
+# fetch instead of sending their own, and later callers get the stored result.
+# Keys whose fetch failed are not stored, so the next caller tries again.
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.results = {}
+        # Key -> Future of the {key: result} batch fetch it is part of
+        self.in_flight = {}
+        _flights.append(self)
+
+    # Return {key: result} for `keys`, calling `fetch(missing keys)` -> {key: result}
+    # for the keys nobody has fetched yet. Keys left out of fetch's result failed
+    # and are left out of the returned dict too.
+    def get(self, keys, fetch):
+        results = {}
+        waiting = {}
+        claimed = []
+        with self.lock:
+            for key in dict.fromkeys(keys):
+                if key in self.results:
+                    results[key] = self.results[key]
+                elif key in self.in_flight:
+                    waiting[key] = self.in_flight[key]
+                else:
+                    claimed.append(key)
+            if claimed:
+                batch = Future()
+                for key in claimed:
+                    self.in_flight[key] = batch
+        metrics.count("memo_lookups_total", len(results), memo=self.name, result="hit")
+        metrics.count("memo_lookups_total", len(waiting), memo=self.name, result="shared")
+        metrics.count("memo_lookups_total", len(claimed), memo=self.name, result="miss")
+
+        # Fetch this caller's keys before waiting on anyone else's, so two
+        # callers never wait on each other
+        fetched = {}
+        if claimed:
+            try:
+                fetched = fetch(claimed)
+            finally:
+                with self.lock:
+                    for key in claimed:
+                        del self.in_flight[key]
+                        if key in fetched:
+                            self.results[key] = fetched[key]
+                batch.set_result(fetched)
+            results.update((key, fetched[key]) for key in claimed if key in fetched)
+
+        for key, future in waiting.items():
+            other = future.result()
+            if key in other:
+                results[key] = other[key]
+        return results
+
+    # Return the stored {key: result} of the keys fetched already, without fetching
+    def known(self, keys):
+        with self.lock:
+            return {key: self.results[key] for key in keys if key in self.results}
+
+    # Forget every stored result
+    def clear(self):
+        with self.lock:
+            self.results = {}
+
+
+# Function to forget the results of every memo, e.g. between the daemon's checks
+def reset():
+    for flight in _flights:
+        flight.clear()
@@ -0,0 +1,208 @@
+import hashlib
+import os
+import sqlite3
+import subprocess
+import tempfile
+import threading
+
+from bigfoot import metrics
+
+# SQLite snapshot of the scanners' persistent state (dedup index, alert queue,
+# watermarks, ...), replaced atomically once per run and committed to git
+STATE_DB = os.getenv("BIGFOOT_STATE_DB", "bigfoot_state.db")
+
+# Working copy the scanners read and write during a run
+WORK_DB = os.getenv("BIGFOOT_WORK_DB", STATE_DB + "-work")
+
+# Snapshot and working copy of what can always be refetched (metadata cache,
+# rarity index). It is never committed; the workflows carry it from run to run
+# in the Actions cache.
+CACHE_DB = os.getenv("BIGFOOT_CACHE_DB", "bigfoot_cache.db")
+CACHE_WORK_DB = os.getenv("BIGFOOT_CACHE_WORK_DB", CACHE_DB + "-work")
+
+# Set STATE_GIT_COMMIT=1 to commit and push the snapshot once at the end of a run
+GIT_COMMIT = os.getenv("STATE_GIT_COMMIT") == "1"
+
+# Pushes tried before giving up, each after merging the state pushed meanwhile
+PUSH_ATTEMPTS = int(os.getenv("STATE_PUSH_ATTEMPTS", "5"))
+
+# Columns of tables that don't count as a state change, being bookkeeping
+# touched on every run; None skips the whole table
+DIGEST_SKIP = {
+    "scan_checkpoints": {"updated_at"},
+    "sync_watermarks": {"updated_at"},
+    "reward_probe_backoff": {"next_probe_at"},
+}
+
+# Snapshot path -> open connection to its working copy
+_connections = {}
+
+# Held around every transaction on the shared connection, which the scan,
+# its worker threads and the Discord sender all use
+lock = threading.RLock()
+
+
+# Function to copy a SQLite database into `target_path` atomically
+def _backup(source, target_path):
+    temp_path = target_path + ".tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    target = sqlite3.connect(temp_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+    os.replace(temp_path, target_path)
+
+
+# Function to open the working copy of a snapshot, once per process. The
+# working copy is refreshed from the snapshot whenever the snapshot is newer,
+# e.g. after a checkout or a cache restore.
+def _open(snapshot_path, work_path):
+    with lock:
+        if snapshot_path not in _connections:
+            if os.path.exists(snapshot_path) and (
+                not os.path.exists(work_path) or os.path.getmtime(snapshot_path) > os.path.getmtime(work_path)
+            ):
+                snapshot = sqlite3.connect(snapshot_path)
+                try:
+                    _backup(snapshot, work_path)
+                finally:
+                    snapshot.close()
+            connection = sqlite3.connect(work_path, check_same_thread=False)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            _connections[snapshot_path] = connection
+        return _connections[snapshot_path]
+
+
+# Function to get the shared state database connection, opening it on first use
+def connect():
+    return _open(STATE_DB, WORK_DB)
+
+
+# Function to get the shared cache database connection, opening it on first use
+def connect_cache():
+    return _open(CACHE_DB, CACHE_WORK_DB)
+
+
+# Function to write the working state, and the cache when it was used, to
+# their snapshots, each as one atomic copy
+def save_snapshot():
+    if not _connections:
+        return False
+    with metrics.span("state_snapshot"), lock:
+        for snapshot_path, connection in _connections.items():
+            _backup(connection, snapshot_path)
+    print(f"Saved state snapshot to {', '.join(_connections)}.")
+    return True
+
+
+# Function to compute a digest of what a state database means to the
+# scanners: every table's rows, leaving out DIGEST_SKIP
+def digest(path=STATE_DB):
+    state = hashlib.blake2b(digest_size=16)
+    connection = sqlite3.connect(path)
+    try:
+        names = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        ).fetchall()
+        for name, in names:
+            skip = DIGEST_SKIP.get(name, set())
+            if skip is None:
+                continue
+            columns = [row[1] for row in connection.execute(f"PRAGMA table_info({name})") if row[1] not in skip]
+            column_list = ", ".join(columns)
+            state.update(f"{name}({column_list})".encode())
+            for row in connection.execute(f"SELECT {column_list} FROM {name} ORDER BY {column_list}"):
+                state.update(repr(row).encode())
+    finally:
+        connection.close()
+    return state.hexdigest()
+
+
+# Function to write the snapshot as committed in `revision` to `path`; returns
+# False when that commit has no snapshot
+def _committed_snapshot(revision, path):
+    committed = subprocess.run(["git", "show", f"{revision}:{STATE_DB}"], capture_output=True)
+    if committed.returncode != 0:
+        return False
+    with open(path, "wb") as file:
+        file.write(committed.stdout)
+    return True
+
+
+# Function to run a git command and return its output
+def _git_output(*args):
+    return subprocess.run(["git", *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+# Function to check whether the snapshot means something different from the
+# one in the last commit; a byte-level diff can't tell, since SQLite rewrites
+# pages and headers whenever anything is touched
+def snapshot_changed():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "committed.db")
+        if not _committed_snapshot("HEAD", path):
+            return True
+        return digest(path) != digest(STATE_DB)
+
+
+# Function to move the state commit onto whatever was pushed since the run
+# started. Git can't merge two snapshots, so the rebase keeps the pushed one
+# (dropping the commit when that was all it changed), and this run's changes
+# since its base are then merged into it the way shard snapshots are merged.
+def _rebase_snapshot(message):
+    from bigfoot import shard
+
+    with tempfile.TemporaryDirectory() as directory:
+        base_path = os.path.join(directory, "base.db")
+        ours_path = os.path.join(directory, "ours.db")
+        if not _committed_snapshot("HEAD~1", base_path):
+            sqlite3.connect(base_path).close()
+        ours = _committed_snapshot("HEAD", ours_path) and digest(ours_path) != digest(base_path)
+        subprocess.run(["git", "pull", "--rebase", "--strategy-option=ours"], check=True)
+        if not ours or not _committed_snapshot("@{u}", STATE_DB):
+            return
+        shard.merge_states([ours_path], STATE_DB, base_path)
+    subprocess.run(["git", "add", "--", STATE_DB], check=True)
+    dropped = _git_output("rev-parse", "HEAD") == _git_output("rev-parse", "@{u}")
+    if not dropped:
+        subprocess.run(["git", "commit", "--amend", "--no-edit", "--quiet"], check=True)
+    elif subprocess.run(["git", "diff", "--cached", "--quiet"]).returncode != 0:
+        subprocess.run(["git", "commit", "--quiet", "-m", message], check=True)
+
+
+# Function to commit and push the snapshot, plus any `paths` written next to it
+# (e.g. the history store), in a single git commit. The snapshot is only
+# committed when its digest changed. Each workflow runs in its own concurrency
+# group, so another one may push first; the commit is then rebased onto it and
+# the push retried. Returns False if a git command failed.
+def commit_snapshot(message="Update dedup store with new listings", paths=()):
+    with metrics.span("git_commit"):
+        try:
+            paths = [path for path in paths if os.path.exists(path)]
+            if paths:
+                subprocess.run(["git", "add", "--", *paths], check=True)
+            if os.path.exists(STATE_DB) and snapshot_changed():
+                subprocess.run(["git", "add", "--", STATE_DB], check=True)
+            if subprocess.run(["git", "diff", "--cached", "--quiet"]).returncode == 0:
+                print("No state changes to commit.")
+                return True
+            subprocess.run(["git", "commit", "-m", message], check=True)
+            for attempt in range(1, PUSH_ATTEMPTS + 1):
+                if subprocess.run(["git", "push"]).returncode == 0:
+                    print("State changes committed and pushed.")
+                    return True
+                print(f"Push {attempt} of {PUSH_ATTEMPTS} was rejected, merging the state pushed meanwhile.")
+                _rebase_snapshot(message)
+            print(f"Giving up on pushing the state after {PUSH_ATTEMPTS} attempts.")
+            return False
+        except subprocess.CalledProcessError as e:
+            print(f"Error committing or pushing changes: {e}")
+            return False
+
+
+# Function to persist the run's state: one snapshot, plus one commit when enabled
+def persist(commit=GIT_COMMIT):
+    if save_snapshot() and commit:
+        commit_snapshot()
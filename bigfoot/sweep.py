@@ -0,0 +1,74 @@
+import asyncio
+import json
+import os
+
+import requests
+
+# JSON file describing the id sweeps, keyed by sweep name
+SWEEP_CONFIG = os.getenv("SWEEP_CONFIG", "sweeps.json")
+
+# Ids checked per request when a sweep does not set its own batch_size
+DEFAULT_BATCH_SIZE = 25
+
+
+# One configured sweep: a template such as "5-125-{n}-REWARD" expanded over
+# half-open [start, stop) ranges, plus any fixed ids
+class Sweep:
+    def __init__(self, template=None, ranges=(), ids=(), batch_size=DEFAULT_BATCH_SIZE, stop_on_first_hit=False):
+        self.template = template
+        self.ranges = [tuple(bounds) for bounds in ranges]
+        self.fixed_ids = list(ids)
+        self.batch_size = batch_size
+        self.stop_on_first_hit = stop_on_first_hit
+
+    # Every id in the sweep, fixed ids first, without duplicates
+    def ids(self):
+        expanded = [self.template.format(n=n) for start, stop in self.ranges for n in range(start, stop)]
+        return list(dict.fromkeys(self.fixed_ids + expanded))
+
+
+# Function to load a named sweep from the config file
+def load_sweep(name, path=SWEEP_CONFIG):
+    with open(path) as file:
+        return Sweep(**json.load(file)[name])
+
+
+# Function to load the REWARD probe settings from the config file as keyword
+# arguments for RewardPlayerDetector; clubs are given as a sweep
+def load_reward_probes(path=SWEEP_CONFIG):
+    with open(path) as file:
+        config = dict(json.load(file)["rewards"])
+    config["club_ids"] = Sweep(**config.pop("clubs")).ids()
+    return config
+
+
+# Function to check `items` in batches fanned out over the limiter, yielding
+# (item, result) for every hit as soon as its batch completes. `check_batch(batch)`
+# is a blocking call returning {item: result}; falsy results are misses. With
+# `stop_on_first_hit`, batches that have not started yet are cancelled after the
+# first hit.
+async def sweep_ids(items, check_batch, limiter, url, batch_size=DEFAULT_BATCH_SIZE, stop_on_first_hit=False):
+    async def check(batch):
+        try:
+            return await limiter.run(url, check_batch, batch)
+        except requests.exceptions.RequestException as e:
+            print(f"Request error for a batch of {len(batch)} ids: {e}")
+            return {}
+
+    tasks = [asyncio.ensure_future(check(items[i:i + batch_size])) for i in range(0, len(items), batch_size)]
+
+    def cancel_pending():
+        for task in tasks:
+            task.cancel()
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for item, result in (await next_done).items():
+                if result:
+                    if stop_on_first_hit:
+                        cancel_pending()
+                        yield item, result
+                        return
+                    yield item, result
+    finally:
+        cancel_pending()
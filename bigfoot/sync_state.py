@@ -0,0 +1,35 @@
+import time
+
+from bigfoot import state_db
+
+
+# Function to create the watermark table if needed
+def _ensure_table(connection):
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sync_watermarks (
+            name TEXT PRIMARY KEY,
+            timestamp INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL
+        )
+        """
+    )
+
+
+# Function to read the newest listing timestamp processed by the named scan, or None
+def get_watermark(name):
+    connection = state_db.connect()
+    _ensure_table(connection)
+    row = connection.execute("SELECT timestamp FROM sync_watermarks WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+# Function to store the newest listing timestamp processed by the named scan
+def set_watermark(name, timestamp):
+    connection = state_db.connect()
+    _ensure_table(connection)
+    with state_db.lock, connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO sync_watermarks VALUES (?, ?, ?)",
+            (name, int(timestamp), int(time.time())),
+        )
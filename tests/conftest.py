@@ -0,0 +1,62 @@
+import re
+
+import pytest
+
+from bigfoot import footium_api, http_client, metadata_cache, rarity_index, single_flight, state_db
+
+
+# Gives each test its own empty state database in a temporary directory
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(state_db, "STATE_DB", str(tmp_path / "bigfoot_state.db"))
+    monkeypatch.setattr(state_db, "WORK_DB", str(tmp_path / "bigfoot_state.db-work"))
+    monkeypatch.setattr(state_db, "CACHE_DB", str(tmp_path / "bigfoot_cache.db"))
+    monkeypatch.setattr(state_db, "CACHE_WORK_DB", str(tmp_path / "bigfoot_cache.db-work"))
+    monkeypatch.setattr(state_db, "_connections", {})
+    monkeypatch.setattr(metadata_cache, "_cache", None)
+    monkeypatch.setattr(rarity_index, "_indexes", {})
+    single_flight.reset()
+    yield tmp_path
+    for connection in state_db._connections.values():
+        connection.close()
+    single_flight.reset()
+
+
+# Stand-in for the Footium GraphQL API answering from `players` {player_id:
+# record} and `divisions` {club_id: name}; every request is kept in `requests`
+class FakeFootium:
+    def __init__(self):
+        self.players = {}
+        self.divisions = {}
+        self.requests = []
+
+    def post(self, url, json=None, **kwargs):
+        self.requests.append(json)
+        data = {}
+        for name, variable in re.findall(r"(\w+): \w+\(where: \$(\w+)\)", json["query"]):
+            key = str(json["variables"][variable]["id"])
+            if name.startswith("c"):
+                division = self.divisions.get(key)
+                data[name] = None if division is None else {"id": key, "division": {"name": division}}
+            else:
+                data[name] = self.players.get(key)
+        return FakeResponse({"data": data})
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+        self.text = str(body)
+
+    def json(self):
+        return self.body
+
+
+@pytest.fixture
+def footium(monkeypatch):
+    fake = FakeFootium()
+    monkeypatch.setattr(http_client, "post", fake.post)
+    monkeypatch.setattr(footium_api.http_client, "post", fake.post)
+    return fake
@@ -0,0 +1,36 @@
+import asyncio
+
+from bigfoot import rarity_index
+from bigfoot.detectors import RegenRefreshDetector
+from bigfoot.footium_api import ACADEMY_GENERATION
+from bigfoot.metadata_cache import get_cache
+
+
+# Stand-in for the HostLimiter that calls straight through
+class DirectLimiter:
+    async def run(self, host, function, *args):
+        return function(*args)
+
+
+def test_regen_refresh_invalidates_what_the_academy_detectors_read(state, monkeypatch):
+    cache = get_cache()
+    cache.put_many({
+        f"player:{ACADEMY_GENERATION}-7-0": {"rarity": "Rare"},
+        f"player:{ACADEMY_GENERATION}-70-0": {"rarity": "Rare"},
+    })
+    index = rarity_index.get_index()
+    index.update("7", [{"rarity": "Rare"}], "Division 3")
+    index.save()
+
+    detector = RegenRefreshDetector("https://discord.com/api/webhooks/1/token", sweep=None)
+    alerts = []
+    monkeypatch.setattr(detector, "post_to_webhook", lambda club_id, player_ids: alerts.append(club_id))
+    asyncio.run(detector.on_hit("7", ["4-7-0"], DirectLimiter()))
+
+    assert alerts == ["7"]
+    keys = [f"player:{ACADEMY_GENERATION}-7-0", f"player:{ACADEMY_GENERATION}-70-0"]
+    assert cache.get_many(keys, ["rarity"]) == {
+        f"player:{ACADEMY_GENERATION}-70-0": {"rarity": "Rare"},
+    }
+    assert rarity_index.RarityIndex().lookup("7") is None
+    assert detector.generation not in rarity_index._indexes
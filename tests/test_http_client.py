@@ -0,0 +1,31 @@
+from bigfoot import http_client
+
+
+# Response whose close() is recorded
+class ClosingResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {"Content-Length": "0"}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+# Session answering with the given responses in turn
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def request(self, method, url, **kwargs):
+        return self.responses.pop(0)
+
+
+def test_streamed_response_is_closed_before_a_retry(monkeypatch):
+    failed, ok = ClosingResponse(503), ClosingResponse(200)
+    monkeypatch.setattr(http_client, "get_session", lambda: FakeSession([failed, ok]))
+    monkeypatch.setattr(http_client, "backoff_delay", lambda attempt: 0)
+
+    assert http_client.get("https://api.opensea.io/listings", stream=True) is ok
+    assert failed.closed
+    assert not ok.closed
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from bigfoot.json_stream import JsonArrayStream
+
+DOCUMENT = json.dumps({
+    "before": {"nested": [1, 2.5, None]},
+    "orders": [
+        1.5, -2e10, 0, 12345, -0.25, 3E+2, True, False, None,
+        "plain", "escaped \" \\ é ☃ \U0001f600", [], {}, [1, [2.75, {"a": 1e-3}]],
+        {"price": "1000000000000000000", "token": 42},
+    ],
+    "next": "cursor",
+    "count": 7.125,
+}, ensure_ascii=False).encode()
+
+
+# Function to read DOCUMENT split into `chunks` through the stream
+def read(chunks, key="orders"):
+    stream = JsonArrayStream(chunks, key)
+    return list(stream), stream
+
+
+def test_whole_document():
+    items, stream = read([DOCUMENT])
+    expected = json.loads(DOCUMENT)
+    assert items == expected["orders"]
+    assert stream.found
+    assert stream.meta == {name: value for name, value in expected.items() if name != "orders"}
+
+
+@pytest.mark.parametrize("offset", range(1, len(DOCUMENT)))
+def test_split_at_every_offset(offset):
+    items, stream = read([DOCUMENT[:offset], DOCUMENT[offset:]])
+    expected = json.loads(DOCUMENT)
+    assert items == expected["orders"]
+    assert stream.meta["count"] == expected["count"]
+    assert stream.meta["next"] == expected["next"]
+
+
+def test_one_byte_chunks():
+    items, stream = read([DOCUMENT[i:i + 1] for i in range(len(DOCUMENT))])
+    assert items == json.loads(DOCUMENT)["orders"]
+    assert stream.meta["count"] == 7.125
+
+
+@pytest.mark.parametrize("chunks, expected", [
+    ([b'{"orders": [1.', b'5]}'], [1.5]),
+    ([b'{"orders": [1', b'e3]}'], [1000.0]),
+    ([b'{"orders": [1e', b'-3]}'], [0.001]),
+    ([b'{"orders": [-', b'2]}'], [-2]),
+    ([b'{"orders": [12', b'34, 5]}'], [1234, 5]),
+])
+def test_number_cut_at_chunk_boundary(chunks, expected):
+    assert read(chunks)[0] == expected
+
+
+def test_number_at_end_of_document():
+    stream = JsonArrayStream([b'{"orders": [], "count": 1', b'2}'], "orders")
+    assert list(stream) == []
+    assert stream.meta == {"count": 12}
+
+
+def test_missing_key():
+    items, stream = read([b'{"other": [1, 2]}'])
+    assert items == []
+    assert not stream.found
+    assert stream.meta == {"other": [1, 2]}
+
+
+@pytest.mark.parametrize("document", [b'{"orders": [1, 2', b'{"orders": [1 2]}', b'[1, 2]', b'{"orders": [1.]}'])
+def test_invalid_document(document):
+    with pytest.raises(ValueError):
+        read([document])
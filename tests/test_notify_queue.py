@@ -0,0 +1,55 @@
+import sqlite3
+
+from bigfoot import http_client, notify_queue
+from bigfoot.notify_queue import NotificationQueue
+
+WEBHOOK_URL = "https://discord.com/api/webhooks/1/secret-token"
+
+
+# Function to build a queue on an in-memory database with DISCORD_WEBHOOK_URL set
+def make_queue(monkeypatch):
+    monkeypatch.setenv("DISCORD_WEBHOOK_URL", WEBHOOK_URL)
+    monkeypatch.delenv("DISCORD_WEBHOOK_URL2", raising=False)
+    monkeypatch.setattr(NotificationQueue, "start", lambda self: None)
+    connection = sqlite3.connect(":memory:", check_same_thread=False)
+    return NotificationQueue(connection), connection
+
+
+def test_queued_alert_stores_the_variable_not_the_url(monkeypatch):
+    queue, connection = make_queue(monkeypatch)
+    queue.enqueue(WEBHOOK_URL, notify_queue.make_embed("Rare!"))
+    rows = connection.execute("SELECT * FROM outbound_alerts").fetchall()
+    assert len(rows) == 1
+    assert "DISCORD_WEBHOOK_URL" in rows[0]
+    assert not any("secret-token" in str(value) for value in rows[0])
+
+
+def test_unknown_webhook_url_is_not_queued(monkeypatch):
+    queue, connection = make_queue(monkeypatch)
+    queue.enqueue("https://discord.com/api/webhooks/2/other", notify_queue.make_embed("Rare!"))
+    assert queue.pending() == 0
+
+
+def test_alert_is_sent_to_the_url_set_at_send_time(monkeypatch):
+    queue, connection = make_queue(monkeypatch)
+    queue.enqueue(WEBHOOK_URL, notify_queue.make_embed("Rare!"))
+    monkeypatch.setenv("DISCORD_WEBHOOK_URL", WEBHOOK_URL + "-rotated")
+    sent = []
+
+    class Response:
+        status_code = 204
+
+    monkeypatch.setattr(http_client, "post", lambda url, json: sent.append(url) or Response())
+    webhook, batch = queue._next_batch()
+    queue._send(webhook, batch)
+    assert sent == [WEBHOOK_URL + "-rotated"]
+    assert queue.pending() == 0
+
+
+def test_alert_stays_queued_while_its_variable_is_unset(monkeypatch):
+    queue, connection = make_queue(monkeypatch)
+    queue.enqueue(WEBHOOK_URL, notify_queue.make_embed("Rare!"))
+    monkeypatch.delenv("DISCORD_WEBHOOK_URL")
+    webhook, batch = queue._next_batch()
+    queue._send(webhook, batch)
+    assert queue.pending() == 1
@@ -0,0 +1,36 @@
+from bigfoot import rarity_index
+from bigfoot.footium_api import ACADEMY_GENERATION, ACADEMY_SLOTS, academy_player_id
+from bigfoot.metadata_cache import get_cache
+
+
+# Function to set every academy slot of a club in the fake Footium API
+def set_academy(footium, club_id, rarity):
+    for n in ACADEMY_SLOTS:
+        player_id = academy_player_id(club_id, n, ACADEMY_GENERATION)
+        footium.players[player_id] = {"id": player_id, "rarity": rarity, "potential": 80}
+
+
+def test_crawl_fetches_live_over_fresh_cache_entries(state, footium):
+    footium.divisions["7"] = "Division 3"
+    set_academy(footium, "7", "Common")
+    index = rarity_index.get_index()
+    assert rarity_index.crawl_batch(index, ["7"]) == 1
+    assert index.has_unminted_rare_player("7") is False
+
+    # The academy changes while the cache still holds the old, fresh answers
+    set_academy(footium, "7", "Rare")
+    requests_before = len(footium.requests)
+    assert rarity_index.crawl_batch(index, ["7"]) == 1
+    assert len(footium.requests) > requests_before
+    assert index.has_unminted_rare_player("7") is True
+
+    # The live answers are written back to the cache
+    key = f"player:{academy_player_id('7', 0, ACADEMY_GENERATION)}"
+    assert get_cache().get_many([key], ["rarity"])[key] == {"rarity": "Rare"}
+
+
+def test_crawl_leaves_clubs_without_a_division_out(state, footium):
+    set_academy(footium, "7", "Rare")
+    index = rarity_index.get_index()
+    assert rarity_index.crawl_batch(index, ["7"]) == 0
+    assert index.lookup("7") is None
@@ -0,0 +1,112 @@
+import asyncio
+
+from bigfoot.reward_frontier import FrontierStore, advance_frontiers, reward_player_id
+
+GENERATION = 5
+FIRST_NUMBER = 181
+
+
+# Lookup answering from the set of REWARD numbers that exist per club, keeping
+# every round of probed numbers in `rounds`
+class FakeRewards:
+    def __init__(self, existing):
+        self.existing = existing
+        self.rounds = []
+
+    async def __call__(self, player_ids):
+        numbers = {}
+        results = {}
+        for player_id in player_ids:
+            _, club_id, number, _ = player_id.split("-")
+            numbers.setdefault(club_id, []).append(int(number))
+            results[player_id] = {"id": player_id} if int(number) in self.existing.get(club_id, ()) else None
+        self.rounds.append(numbers)
+        return results
+
+
+# Function to run advance_frontiers for the given clubs
+def advance(club_ids, lookup, store):
+    return asyncio.run(advance_frontiers(club_ids, GENERATION, FIRST_NUMBER, lookup, store))
+
+
+# Function to list the numbers probed for a club, round by round
+def probed(lookup, club_id):
+    return [number for numbers in lookup.rounds for number in numbers.get(club_id, [])]
+
+
+def test_no_new_id_probes_the_next_id_on_every_run(state):
+    store = FrontierStore()
+    lookup = FakeRewards({"7": set()})
+
+    assert advance(["7"], lookup, store) == {}
+    assert advance(["7"], lookup, store) == {}
+    assert probed(lookup, "7") == [FIRST_NUMBER, FIRST_NUMBER]
+    assert store.frontiers(GENERATION, ["7"], 0) == {"7": 0}
+    assert store.connection.execute("SELECT COUNT(*) FROM reward_probe_backoff").fetchone()[0] == 0
+
+
+def test_gallop_then_binary_search_finds_the_last_new_id(state):
+    store = FrontierStore()
+    lookup = FakeRewards({"7": set(range(FIRST_NUMBER, FIRST_NUMBER + 5))})
+
+    advanced = advance(["7"], lookup, store)
+
+    newest = FIRST_NUMBER + 4
+    assert advanced == {"7": (FIRST_NUMBER - 1, newest, {"id": reward_player_id(GENERATION, "7", newest)})}
+    # Gallop to +1, +3, +7 (missing), then binary search 5 and 6 back
+    assert probed(lookup, "7") == [FIRST_NUMBER + n for n in (0, 2, 6, 4, 5)]
+    assert store.frontiers(GENERATION, ["7"], 0) == {"7": newest}
+
+
+def test_gap_right_after_the_frontier_stops_the_search(state):
+    store = FrontierStore()
+    lookup = FakeRewards({"7": {FIRST_NUMBER + 1, FIRST_NUMBER + 2}})
+
+    assert advance(["7"], lookup, store) == {}
+    assert probed(lookup, "7") == [FIRST_NUMBER]
+
+    # Once the gap is filled, the whole run is found
+    lookup.existing["7"].add(FIRST_NUMBER)
+    assert advance(["7"], lookup, store)["7"][:2] == (FIRST_NUMBER - 1, FIRST_NUMBER + 2)
+
+
+def test_backed_off_far_probe_is_taken_as_missing(state):
+    store = FrontierStore()
+    lookup = FakeRewards({"7": {FIRST_NUMBER, FIRST_NUMBER + 1}})
+    flaky = reward_player_id(GENERATION, "7", FIRST_NUMBER + 1)
+
+    # The binary search step fails, so the frontier stays but +3 is backing off
+    async def failing(player_ids):
+        results = await lookup(player_ids)
+        results.pop(flaky, None)
+        return results
+
+    assert advance(["7"], failing, store) == {}
+    assert probed(lookup, "7") == [FIRST_NUMBER + n for n in (0, 2, 1)]
+    assert not store.due(GENERATION, "7", FIRST_NUMBER + 2)
+
+    lookup.rounds.clear()
+    assert advance(["7"], lookup, store)["7"][:2] == (FIRST_NUMBER - 1, FIRST_NUMBER + 1)
+    assert probed(lookup, "7") == [FIRST_NUMBER + n for n in (0, 1)]
+
+
+def test_backed_off_id_right_after_the_frontier_is_still_probed(state):
+    store = FrontierStore()
+    lookup = FakeRewards({"7": {FIRST_NUMBER, FIRST_NUMBER + 1}})
+    advance(["7"], lookup, store)
+    assert not store.due(GENERATION, "7", FIRST_NUMBER + 2)
+
+    lookup.existing["7"].add(FIRST_NUMBER + 2)
+    lookup.rounds.clear()
+    assert advance(["7"], lookup, store)["7"][:2] == (FIRST_NUMBER + 1, FIRST_NUMBER + 2)
+    assert probed(lookup, "7")[0] == FIRST_NUMBER + 2
+
+
+def test_failed_lookup_keeps_the_frontier(state):
+    store = FrontierStore()
+
+    async def lookup(player_ids):
+        return {}
+
+    assert advance(["7"], lookup, store) == {}
+    assert store.frontiers(GENERATION, ["7"], 0) == {"7": 0}
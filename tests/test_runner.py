@@ -0,0 +1,66 @@
+import asyncio
+
+from bigfoot import runner
+from bigfoot.detectors import Detector
+from bigfoot.opensea_api import Listing
+
+
+# Stand-in for the HostLimiter that calls straight through
+class DirectLimiter:
+    async def run(self, host, function, *args):
+        return function(*args)
+
+
+# Detector asking for one player per listed club, prefixed by its name, and
+# keeping the order in which it was evaluated in `log`
+class FakeDetector(Detector):
+    def __init__(self, name, log, alerts=True):
+        self.name = name
+        self.fields = f"id {name}"
+        self.log = log
+        self.alerts = alerts
+
+    def listing_player_ids(self, rows):
+        return [f"{self.name}-{identifier}" for identifier, _, _, _ in rows]
+
+    async def evaluate_listings(self, rows, players, limiter):
+        self.log.append((self.name, [row.identifier for row in rows]))
+
+
+def test_recorder_lookups_run_after_alerts_and_never_defer_rows(monkeypatch):
+    log = []
+
+    # Every lookup of the recorder's players fails
+    def get_players_metadata(player_ids, fields):
+        log.append(("fetch", fields))
+        return {} if "history" in fields else {player_id: {"id": player_id} for player_id in player_ids}
+
+    monkeypatch.setattr(runner, "get_players_metadata", get_players_metadata)
+    detectors = [FakeDetector("history", log, alerts=False), FakeDetector("academy", log)]
+    rows = [Listing("1", "0xclub", 10), Listing("2", "0xclub", 20)]
+
+    deferred = asyncio.run(runner.check_listings(detectors, rows, runner.PlayerSnapshot(), DirectLimiter()))
+
+    assert deferred == []
+    assert log == [
+        ("fetch", "id academy"),
+        ("academy", ["1", "2"]),
+        ("fetch", "id history"),
+        ("history", ["1", "2"]),
+    ]
+
+
+def test_rows_with_a_failed_alerting_lookup_are_deferred(monkeypatch):
+    log = []
+    monkeypatch.setattr(
+        runner, "get_players_metadata", lambda player_ids, fields: {
+            player_id: {"id": player_id} for player_id in player_ids if player_id != "academy-2"
+        }
+    )
+    detectors = [FakeDetector("history", log, alerts=False), FakeDetector("academy", log)]
+    rows = [Listing("1", "0xclub", 10), Listing("2", "0xclub", 20)]
+
+    deferred = asyncio.run(runner.check_listings(detectors, rows, runner.PlayerSnapshot(), DirectLimiter()))
+
+    assert [row.identifier for row in deferred] == ["2"]
+    assert log == [("academy", ["1"]), ("history", ["1"])]
@@ -0,0 +1,73 @@
+from bigfoot import listing_scan, scanner
+from bigfoot.opensea_api import Listing, ListingPage
+from bigfoot.scan_checkpoint import ScanCheckpoint
+from bigfoot.sync_state import get_watermark
+
+PAGE_A = [Listing("1", "0xclub", 10, "a1"), Listing("2", "0xclub", 20, "a2")]
+PAGE_B = [Listing("3", "0xclub", 30, "b3")]
+
+
+def test_interrupted_walk_resumes_without_handling_a_listing_twice(state):
+    checkpoint = ScanCheckpoint("listings")
+    assert not checkpoint.begin("pages")
+    checkpoint.page_done(PAGE_A, "cursor-b")
+
+    # The run is killed here; the next one picks the walk up again
+    resumed = ScanCheckpoint("listings")
+    assert resumed.begin("pages")
+    assert resumed.cursor == "cursor-b"
+    assert resumed.unprocessed(PAGE_A + PAGE_B) == PAGE_B
+
+
+def test_a_different_or_stale_walk_starts_over(state):
+    checkpoint = ScanCheckpoint("listings")
+    checkpoint.begin("events", 1000)
+    checkpoint.page_done(PAGE_A, "cursor-b")
+
+    other = ScanCheckpoint("listings")
+    assert not other.begin("events", 2000)
+    assert other.cursor is None and other.unprocessed(PAGE_A) == PAGE_A
+
+    stale = ScanCheckpoint("listings", max_age=-1)
+    assert not stale.begin("events", 1000)
+
+
+def test_pending_listings_outlive_the_walk_until_resolved(state):
+    checkpoint = ScanCheckpoint("listings")
+    checkpoint.begin("pages")
+    expired = Listing("4", "0xclub", 40, "x4", expires_at=1)
+    checkpoint.defer(PAGE_A + [expired])
+    checkpoint.resolve(PAGE_A[:1])
+    checkpoint.finish()
+
+    reloaded = ScanCheckpoint("listings")
+    assert not reloaded.begin("pages")
+    pending = reloaded.pending_listings()
+    assert [(listing.identifier, listing.order_hash) for listing in pending] == [("2", "a2")]
+
+
+# Function to serve listing pages by cursor; a None page is a failed request
+def serve_pages(monkeypatch, pages):
+    monkeypatch.setattr(scanner, "get_listings_page", lambda cursor: pages[cursor])
+
+
+def test_walk_resumes_and_rechecks_listings_whose_lookups_failed(state, monkeypatch):
+    monkeypatch.setattr(listing_scan, "COLLECTION_WINDOW", 0)
+    monkeypatch.setattr(listing_scan, "RESUME_ATTEMPTS", 0)
+    handled = []
+
+    async def handle_page(rows, limiter):
+        handled.append(sorted(row.identifier for row in rows))
+        # The player lookups of club 2 fail during the first run
+        return [row for row in rows if row.identifier == "2" and len(handled) == 1]
+
+    serve_pages(monkeypatch, {None: ListingPage(PAGE_A, "cursor-b", 0, True), "cursor-b": None})
+    listing_scan.scan_new_listings("listings", handle_page, full_scan=True)
+    assert handled == [["1", "2"]]
+    assert get_watermark("listings") is None
+
+    serve_pages(monkeypatch, {"cursor-b": ListingPage(PAGE_B, None, 0, True)})
+    listing_scan.scan_new_listings("listings", handle_page, full_scan=True)
+    assert sorted(sum(handled[1:], [])) == ["2", "3"]
+    assert get_watermark("listings") is not None
+    assert ScanCheckpoint("listings").pending_listings() == []
@@ -0,0 +1,124 @@
+import shutil
+import sqlite3
+
+from bigfoot import shard
+
+SCHEMA = [
+    "CREATE TABLE regen_hashes (club_id TEXT PRIMARY KEY, hash TEXT)",
+    "CREATE TABLE reward_frontiers (generation INTEGER NOT NULL, club_id TEXT NOT NULL, "
+    "frontier INTEGER NOT NULL, PRIMARY KEY (generation, club_id))",
+    "CREATE TABLE sync_watermarks (name TEXT PRIMARY KEY, timestamp INTEGER NOT NULL, updated_at INTEGER NOT NULL)",
+    "CREATE TABLE outbound_alerts (id INTEGER PRIMARY KEY AUTOINCREMENT, webhook TEXT NOT NULL, "
+    "embed TEXT NOT NULL, created_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, next_attempt REAL NOT NULL)",
+]
+
+
+# Function to run SQL statements against a database file
+def execute(path, *statements):
+    connection = sqlite3.connect(path)
+    with connection:
+        for statement in statements:
+            connection.execute(statement)
+    connection.close()
+
+
+# Function to read every row of a table, sorted
+def rows(path, table):
+    connection = sqlite3.connect(path)
+    try:
+        return sorted(connection.execute(f"SELECT * FROM {table}"))
+    finally:
+        connection.close()
+
+
+# Function to write the base snapshot to `tmp_path` and one copy of it per
+# shard, each recording itself as shard i of `count`
+def make_shards(tmp_path, count, *base_statements):
+    state_path = str(tmp_path / "bigfoot_state.db")
+    execute(state_path, *SCHEMA, *base_statements)
+    shard_paths = []
+    for index in range(count):
+        path = str(tmp_path / f"shard-{index}.db")
+        shutil.copyfile(state_path, path)
+        execute(
+            path,
+            f"CREATE TABLE {shard.SHARD_TABLE} (shard INTEGER PRIMARY KEY, count INTEGER)",
+            f"INSERT INTO {shard.SHARD_TABLE} VALUES ({index}, {count})",
+        )
+        shard_paths.append(path)
+    return state_path, shard_paths
+
+
+def test_row_deleted_by_one_shard_is_deleted(tmp_path):
+    state_path, (first, second) = make_shards(
+        tmp_path, 2, "INSERT INTO regen_hashes VALUES ('1', 'a'), ('2', 'b')"
+    )
+    execute(first, "DELETE FROM regen_hashes WHERE club_id = '1'")
+    execute(second, "UPDATE regen_hashes SET hash = 'c' WHERE club_id = '2'")
+
+    shard.merge_states([first, second], state_path)
+
+    assert rows(state_path, "regen_hashes") == [("2", "c")]
+    assert not any(name.endswith((".base", ".merge")) for name in map(str, tmp_path.iterdir()))
+
+
+def test_alerts_queued_by_several_shards_are_renumbered(tmp_path):
+    alert = "INSERT INTO outbound_alerts (webhook, embed, created_at, next_attempt) VALUES ('W', '{}', 0, 0)"
+    state_path, (first, second) = make_shards(tmp_path, 2, alert.replace("{}", "base"))
+    # Both shards queue an alert as id 2; the second also delivers the base one
+    execute(first, alert.replace("{}", "first"))
+    execute(second, alert.replace("{}", "second"), "DELETE FROM outbound_alerts WHERE id = 1")
+
+    shard.merge_states([first, second], state_path)
+
+    alerts = rows(state_path, "outbound_alerts")
+    assert sorted(embed for _, _, embed, _, _, _ in alerts) == ["first", "second"]
+    assert len({alert_id for alert_id, *_ in alerts}) == 2
+
+
+def test_conflicting_frontiers_keep_the_larger(tmp_path):
+    for order in (1, -1):
+        directory = tmp_path / str(order)
+        directory.mkdir()
+        state_path, (first, second) = make_shards(directory, 2, "INSERT INTO reward_frontiers VALUES (5, '7', 180)")
+        execute(first, "UPDATE reward_frontiers SET frontier = 185")
+        execute(second, "UPDATE reward_frontiers SET frontier = 183")
+
+        shard.merge_states([first, second][::order], state_path)
+
+        assert rows(state_path, "reward_frontiers") == [(5, "7", 185)]
+
+
+def test_watermarks_move_to_the_slowest_shard_once_all_reported(tmp_path):
+    state_path, shard_paths = make_shards(tmp_path, 3, "INSERT INTO sync_watermarks VALUES ('listings', 100, 0)")
+    for path, timestamp in zip(shard_paths, (300, 200, 400)):
+        execute(path, f"UPDATE sync_watermarks SET timestamp = {timestamp}, updated_at = 1")
+
+    shard.merge_states(shard_paths, state_path)
+
+    assert rows(state_path, "sync_watermarks") == [("listings", 200, 1)]
+
+
+def test_missing_shard_keeps_the_old_watermarks(tmp_path):
+    state_path, shard_paths = make_shards(tmp_path, 3, "INSERT INTO sync_watermarks VALUES ('listings', 100, 0)")
+    for path in shard_paths:
+        execute(path, "UPDATE sync_watermarks SET timestamp = 300, updated_at = 1")
+    execute(shard_paths[0], "INSERT INTO regen_hashes VALUES ('1', 'a')")
+
+    shard.merge_states(shard_paths[:2], state_path)
+
+    assert rows(state_path, "sync_watermarks") == [("listings", 100, 0)]
+    assert rows(state_path, "regen_hashes") == [("1", "a")]
+
+
+def test_changes_are_taken_against_the_given_base(tmp_path):
+    state_path, (only,) = make_shards(tmp_path, 1, "INSERT INTO regen_hashes VALUES ('1', 'a')")
+    base_path = str(tmp_path / "base.db")
+    shutil.copyfile(state_path, base_path)
+    # Committed by another workflow after the shard started
+    execute(state_path, "INSERT INTO regen_hashes VALUES ('2', 'b')")
+    execute(only, "UPDATE regen_hashes SET hash = 'c'")
+
+    shard.merge_states([only], state_path, base_path)
+
+    assert rows(state_path, "regen_hashes") == [("1", "c"), ("2", "b")]
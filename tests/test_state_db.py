@@ -0,0 +1,86 @@
+import sqlite3
+import subprocess
+
+from bigfoot import rarity_index, state_db, sync_state
+from bigfoot.metadata_cache import get_cache
+
+
+def test_rewriting_a_watermark_keeps_the_digest(state, monkeypatch):
+    sync_state.set_watermark("listings", 1000)
+    state_db.save_snapshot()
+    before = state_db.digest(state_db.STATE_DB)
+
+    monkeypatch.setattr(sync_state.time, "time", lambda: 2 ** 31)
+    sync_state.set_watermark("listings", 1000)
+    state_db.save_snapshot()
+    assert state_db.digest(state_db.STATE_DB) == before
+
+    sync_state.set_watermark("listings", 2000)
+    state_db.save_snapshot()
+    assert state_db.digest(state_db.STATE_DB) != before
+
+
+def test_caches_stay_out_of_the_committed_snapshot(state):
+    get_cache().put_many({"player:5-7-0": {"rarity": "Rare"}})
+    index = rarity_index.get_index()
+    index.update("7", [{"rarity": "Rare"}], "Division 3")
+    index.save()
+    sync_state.set_watermark("listings", 1000)
+    state_db.save_snapshot()
+
+    def tables(path):
+        connection = sqlite3.connect(path)
+        try:
+            return {name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        finally:
+            connection.close()
+
+    assert tables(state_db.STATE_DB) == {"sync_watermarks"}
+    assert {"metadata_cache", "academy_index"} <= tables(state_db.CACHE_DB)
+
+
+def test_a_rejected_push_merges_the_state_pushed_meanwhile(state, monkeypatch):
+    for name in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME", "GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(name, "test")
+    monkeypatch.setattr(state_db, "STATE_DB", "bigfoot_state.db")
+
+    def git(*args, cwd):
+        subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+    def write(path, sql, *params):
+        connection = sqlite3.connect(path)
+        with connection:
+            connection.execute(sql, params)
+        connection.close()
+
+    git("init", "--bare", "--quiet", "remote.git", cwd=state)
+    git("clone", "--quiet", "remote.git", "other", cwd=state)
+    other = state / "other"
+    write(other / "bigfoot_state.db", "CREATE TABLE regen_hashes (club_id TEXT PRIMARY KEY, hash TEXT)")
+    write(other / "bigfoot_state.db", "INSERT INTO regen_hashes VALUES ('1', 'old')")
+    sync_state._ensure_table(sqlite3.connect(other / "bigfoot_state.db"))
+    git("add", "bigfoot_state.db", cwd=other)
+    git("commit", "--quiet", "-m", "base", cwd=other)
+    git("push", "--quiet", "origin", "HEAD", cwd=other)
+    git("clone", "--quiet", "remote.git", "ours", cwd=state)
+
+    # Another workflow pushes first
+    write(other / "bigfoot_state.db", "INSERT INTO regen_hashes VALUES ('2', 'other')")
+    write(other / "bigfoot_state.db", "INSERT INTO sync_watermarks VALUES ('regen', 50, 0)")
+    git("commit", "--quiet", "-am", "other", cwd=other)
+    git("push", "--quiet", cwd=other)
+
+    ours = state / "ours"
+    write(ours / "bigfoot_state.db", "UPDATE regen_hashes SET hash = 'ours' WHERE club_id = '1'")
+    write(ours / "bigfoot_state.db", "INSERT INTO sync_watermarks VALUES ('listings', 2000, 0)")
+    monkeypatch.chdir(ours)
+    assert state_db.commit_snapshot("ours")
+
+    git("pull", "--quiet", cwd=other)
+    connection = sqlite3.connect(other / "bigfoot_state.db")
+    assert sorted(connection.execute("SELECT * FROM regen_hashes")) == [("1", "ours"), ("2", "other")]
+    assert sorted(connection.execute("SELECT name, timestamp FROM sync_watermarks")) == [
+        ("listings", 2000),
+        ("regen", 50),
+    ]
+    connection.close()